@@ -4,15 +4,42 @@ Complete version with video library, fixed mentor authentication, and SDG course
 """
 
 import os
+import json
+import base64
+import math
+import mmap
+import struct
+import hashlib
+import hmac
+import bisect
 import logging
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from flask import Flask, Response, abort, current_app, g, render_template, request, redirect, send_from_directory, session, url_for, flash, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import DeclarativeBase, Session
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from datetime import datetime, timedelta
 import xml.etree.ElementTree as ET
 
+try:
+    import fcntl
+except ImportError:  # Windows: token buckets fall back to per-process memory
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # Optional faster JSON encoder for the catalog API
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
@@ -105,7 +132,8 @@ class Course(db.Model):
 
 class Video(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    # active_history loads the old course on reassignment so both playlists are invalidated
+    course_id = db.column_property(db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False), active_history=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     video_url = db.Column(db.String(500), nullable=False)
@@ -118,6 +146,11 @@ class Video(db.Model):
     # Relationships
     video_progress = db.relationship('VideoProgress', backref='video')
 
+class CoursePlaylistVersion(db.Model):
+    """Version counter bumped on every Video change, used to invalidate cached playlists"""
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
 class CourseProgress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     participant_id = db.Column(db.Integer, db.ForeignKey('participant_profile.id'), nullable=False)
@@ -129,6 +162,8 @@ class CourseProgress(db.Model):
     
     # Relationships
     video_progress = db.relationship('VideoProgress', backref='course_progress')
+    
+    __table_args__ = (db.UniqueConstraint('participant_id', 'course_id'),)
 
 class VideoProgress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -175,6 +210,26 @@ class MentorFeedback(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class FeedbackDraft(db.Model):
+    """Compact key-value store for autosaved mentor feedback drafts"""
+    mentor_id = db.Column(db.Integer, db.ForeignKey('mentor_profile.id'), primary_key=True)
+    participant_id = db.Column(db.Integer, db.ForeignKey('participant_profile.id'), primary_key=True)
+    week_number = db.Column(db.Integer, primary_key=True)
+    
+    payload = db.Column(db.Text, nullable=False)
+    payload_hash = db.Column(db.String(40), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class ProgressEvent(db.Model):
+    """Short-lived progress event log shared by all workers for live dashboard feeds"""
+    id = db.Column(db.Integer, primary_key=True)
+    # NULL for system-wide events such as leaderboard rebuilds
+    participant_id = db.Column(db.Integer, db.ForeignKey('participant_profile.id'))
+    event_type = db.Column(db.String(30), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
 class Achievement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     participant_id = db.Column(db.Integer, db.ForeignKey('participant_profile.id'), nullable=False)
@@ -186,8 +241,9 @@ class Achievement(db.Model):
     participant = db.relationship('ParticipantProfile', backref='achievements')
 
 # Helper for safe XML text extraction
+# ({*} matches the tag in any namespace; the data files declare a default xmlns)
 def get_xml_text(element, tag):
-    found = element.find(tag)
+    found = element.find(f'{{*}}{tag}')
     return found.text if found is not None else ""
 
 def load_curriculum_xml():
@@ -197,7 +253,7 @@ def load_curriculum_xml():
         root = tree.getroot()
         
         curriculum = []
-        for theme in root.findall('theme'):
+        for theme in root.findall('{*}theme'):
             theme_data = {
                 'name': theme.get('name'),
                 'title': get_xml_text(theme, 'title'),
@@ -205,13 +261,13 @@ def load_curriculum_xml():
                 'weeks': []
             }
             
-            for week in theme.findall('week'):
+            for week in theme.findall('{*}week'):
                 number_str = week.get('number')
                 week_data = {
                     'number': int(number_str) if number_str is not None else 0,
                     'title': get_xml_text(week, 'title'),
                     'description': get_xml_text(week, 'description'),
-                    'activities': [activity.text for activity in week.findall('activity') if activity is not None and activity.text is not None]
+                    'activities': [activity.text for activity in week.findall('{*}activity') if activity is not None and activity.text is not None]
                 }
                 theme_data['weeks'].append(week_data)
             
@@ -229,7 +285,7 @@ def load_sdg_xml():
         root = tree.getroot()
         
         sdgs = []
-        for sdg in root.findall('sdg'):
+        for sdg in root.findall('{*}sdg'):
             number_str = sdg.get('number')
             sdg_data = {
                 'number': int(number_str) if number_str is not None else 0,
@@ -244,8 +300,1460 @@ def load_sdg_xml():
         logging.error(f"Error loading SDG XML: {e}")
         return []
 
+# SQLite production mode
+# Thread-local flag: when set, the next transaction on this thread starts with BEGIN IMMEDIATE
+_sqlite_write_intent = threading.local()
+# Writers in one process take turns here before BEGIN IMMEDIATE. SQLite's busy handler
+# is unfair, so with many request threads per worker some waiters starve past
+# busy_timeout; this way only one connection per process waits on SQLite.
+_process_write_lock = threading.Lock()
+
+def configure_sqlite_engine(app):
+    """Apply WAL/busy-timeout pragmas and IMMEDIATE write transactions to the SQLite engine"""
+    pragmas = (
+        'PRAGMA journal_mode=WAL',
+        f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}",
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA cache_size=-20000',
+        'PRAGMA mmap_size=134217728',
+        'PRAGMA temp_store=MEMORY'
+    )
+    
+    @event.listens_for(db.engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself so write transactions can be IMMEDIATE
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+    
+    @event.listens_for(db.engine, 'begin')
+    def begin_sqlite_transaction(connection):
+        if getattr(_sqlite_write_intent, 'active', False):
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+        else:
+            connection.exec_driver_sql('BEGIN')
+
+def begin_write():
+    """Make the next transaction a SQLite write transaction (BEGIN IMMEDIATE).
+    
+    Any open read transaction is ended first, so a writer never has to upgrade
+    a deferred lock and fail with 'database is locked'. Call it before the first
+    read the write depends on; pending changes raise rather than being committed
+    under the deferred transaction. No-op unless SQLITE_PRODUCTION_MODE is enabled.
+    """
+    if not current_app.config.get('SQLITE_PRODUCTION_MODE'):
+        return
+    if getattr(_sqlite_write_intent, 'active', False):
+        return
+    session = db.session()
+    if session.new or session.dirty or session.deleted or session.info.get('flushed_writes'):
+        raise RuntimeError('begin_write() called with uncommitted changes; call it before modifying the session')
+    if session.in_transaction():
+        # Read-only transaction: ending it commits nothing
+        session.commit()
+    if not _process_write_lock.acquire(timeout=current_app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000):
+        raise RuntimeError('Timed out waiting for this worker\'s SQLite write lock')
+    _sqlite_write_intent.active = True
+
+def end_write():
+    """Drop this thread's write intent and let the next writer in the process go"""
+    if getattr(_sqlite_write_intent, 'active', False):
+        _sqlite_write_intent.active = False
+        _process_write_lock.release()
+
+@event.listens_for(Session, 'after_flush')
+def track_flushed_writes(session, flush_context):
+    session.info['flushed_writes'] = True
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def clear_write_intent(session):
+    end_write()
+    session.info.pop('flushed_writes', None)
+
+class SQLiteWriteQueue:
+    """Optional per-process writer thread that serializes and batches database writes.
+    
+    The request write paths (logins, course progress, video completions, feedback
+    and drafts) go through submit()/run(). With the queue enabled, each worker
+    process funnels them through one writer thread; each function runs inside a
+    savepoint so one failing write does not discard the rest of its batch, and the
+    whole batch shares one commit. Writers in different processes are still
+    serialized by BEGIN IMMEDIATE and busy_timeout. When the queue is disabled,
+    writes run inline in the caller's session.
+    """
+    
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('SQLITE_WRITE_QUEUE', False)
+        app.config.setdefault('SQLITE_WRITE_BATCH_SIZE', 50)
+        app.config.setdefault('SQLITE_WRITE_BATCH_WAIT_MS', 5)
+        app.config.setdefault('SQLITE_WRITE_TIMEOUT_SECONDS', 10)
+    
+    def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) as a write and wait for its result"""
+        return self.submit(fn, *args, **kwargs).result(timeout=self.app.config['SQLITE_WRITE_TIMEOUT_SECONDS'])
+    
+    def submit_background(self, fn, *args, **kwargs):
+        """Fire-and-forget write; failures are logged since nobody waits on the result"""
+        try:
+            future = self.submit(fn, *args, **kwargs)
+        except Exception as e:
+            logging.error(f"Background write {fn.__name__} failed: {e}")
+            return
+        future.add_done_callback(lambda done: done.exception() and logging.error(
+            f"Background write {fn.__name__} failed: {done.exception()}"))
+    
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) as a write and return a Future for its result"""
+        future = Future()
+        if not self.app.config['SQLITE_WRITE_QUEUE']:
+            begin_write()
+            try:
+                result = fn(*args, **kwargs)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            future.set_result(result)
+            return future
+        
+        self._ensure_writer()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+    
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='sqlite-writer', daemon=True)
+                self._writer.start()
+    
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.app.config['SQLITE_WRITE_BATCH_WAIT_MS'] / 1000
+        while len(batch) < self.app.config['SQLITE_WRITE_BATCH_SIZE']:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _write_loop(self):
+        while True:
+            batch = self._next_batch()
+            with self.app.app_context():
+                try:
+                    begin_write()
+                except Exception as e:
+                    for _, _, _, future in batch:
+                        future.set_exception(e)
+                    continue
+                completed = []
+                for fn, args, kwargs, future in batch:
+                    try:
+                        with db.session.begin_nested():
+                            completed.append((future, fn(*args, **kwargs)))
+                    except Exception as e:
+                        future.set_exception(e)
+                
+                try:
+                    db.session.commit()
+                    for future, result in completed:
+                        future.set_result(result)
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"SQLite write batch failed: {e}")
+                    for future, _ in completed:
+                        future.set_exception(e)
+                finally:
+                    db.session.remove()
+
+write_queue = SQLiteWriteQueue()
+
+def update_last_login(user_id, login_time):
+    """Record a user's last login time"""
+    User.query.filter_by(id=user_id).update({'last_login': login_time})
+
+def get_or_create_course_progress(participant_id, course_id):
+    """Return the id of a participant's CourseProgress for a course, creating it if needed (write)"""
+    course_progress = CourseProgress.query.filter_by(participant_id=participant_id, course_id=course_id).first()
+    if not course_progress:
+        course_progress = CourseProgress(participant_id=participant_id, course_id=course_id)
+        db.session.add(course_progress)
+        db.session.flush()
+    return course_progress.id
+
+def record_video_completion(participant_id, participant_name, video_id):
+    """Mark a video completed, update course progress and notify mentors (write).
+    
+    Returns the course completion percentage.
+    """
+    video = db.session.get(Video, video_id)
+    course_progress = db.session.get(CourseProgress, get_or_create_course_progress(participant_id, video.course_id))
+    
+    # Get or create video progress
+    video_progress = VideoProgress.query.filter_by(
+        course_progress_id=course_progress.id,
+        video_id=video_id
+    ).first()
+    
+    if not video_progress:
+        video_progress = VideoProgress(
+            course_progress_id=course_progress.id,
+            video_id=video_id
+        )
+        db.session.add(video_progress)
+    
+    newly_completed = not video_progress.is_completed
+    video_progress.is_completed = True
+    video_progress.completed_at = datetime.utcnow()
+    
+    # Update course completion percentage
+    total_videos = Video.query.filter_by(course_id=video.course_id).count()
+    completed_videos = VideoProgress.query.join(Video).filter(
+        VideoProgress.course_progress_id == course_progress.id,
+        VideoProgress.is_completed == True,
+        Video.course_id == video.course_id
+    ).count()
+    
+    course_progress.completion_percentage = int((completed_videos / total_videos) * 100)
+    
+    if course_progress.completion_percentage == 100:
+        course_progress.completed_at = datetime.utcnow()
+    
+    # Notify mentors' live dashboards
+    event_data = {
+        'participant_id': participant_id,
+        'participant_name': participant_name,
+        'course_id': video.course_id,
+        'course_title': video.course.title,
+        'video_id': video.id,
+        'video_title': video.title,
+        'completion_percentage': course_progress.completion_percentage,
+        'newly_completed': newly_completed,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    progress_broker.publish(participant_id, 'progress', event_data)
+    if course_progress.completion_percentage == 100:
+        progress_broker.publish(participant_id, 'completion', event_data)
+    
+    return course_progress.completion_percentage
+
+# Feedback draft store
+# Per-worker schedule for the periodic TTL purge (time.monotonic() deadline)
+_next_feedback_draft_purge = 0.0
+
+FEEDBACK_DRAFT_FIELDS = ('participation_rating', 'creativity_rating', 'collaboration_rating',
+                         'initiative_rating', 'comments', 'suggestions', 'flag_for_support')
+
+def parse_rating(value):
+    """Parse a 1-5 rating from form/JSON input, returning None when missing or invalid"""
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+def save_feedback_draft(mentor_id, participant_id, week_number, data, ttl):
+    """Save a feedback draft (last write wins; run through write_queue). Returns False if unchanged."""
+    payload = json.dumps({field: data.get(field) for field in FEEDBACK_DRAFT_FIELDS if data.get(field) not in (None, '')},
+                         sort_keys=True, separators=(',', ':'))
+    payload_hash = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    now = datetime.utcnow()
+    values = {'payload': payload, 'payload_hash': payload_hash, 'updated_at': now, 'expires_at': now + ttl}
+    
+    # Decide against the stored row, not a per-worker cache, so a save that reaches
+    # another worker in between is never mistaken for "unchanged"
+    drafts = FeedbackDraft.query.filter_by(mentor_id=mentor_id, participant_id=participant_id, week_number=week_number)
+    updated = drafts.filter(
+        db.or_(FeedbackDraft.payload_hash != payload_hash, FeedbackDraft.expires_at <= now)
+    ).update(values, synchronize_session=False)
+    saved = bool(updated)
+    if not updated and drafts.with_entities(FeedbackDraft.mentor_id).first() is None:
+        db.session.add(FeedbackDraft(mentor_id=mentor_id, participant_id=participant_id,
+                                     week_number=week_number, **values))
+        saved = True
+    return saved
+
+def load_feedback_draft(mentor_id, participant_id, week_number):
+    """Return the saved draft payload as a dict, or None if missing or expired"""
+    draft = db.session.get(FeedbackDraft, (mentor_id, participant_id, week_number))
+    if draft is None or draft.expires_at <= datetime.utcnow():
+        return None
+    return json.loads(draft.payload)
+
+def delete_feedback_draft(mentor_id, participant_id, week_number):
+    """Remove a draft once the final feedback has been submitted (caller commits)"""
+    FeedbackDraft.query.filter_by(
+        mentor_id=mentor_id,
+        participant_id=participant_id,
+        week_number=week_number
+    ).delete()
+
+def record_mentor_feedback(mentor_id, participant_id, week_number, values):
+    """Save final mentor feedback, discard the matching draft and notify listeners (write)"""
+    feedback = MentorFeedback(participant_id=participant_id, mentor_id=mentor_id, week_number=week_number, **values)
+    db.session.add(feedback)
+    delete_feedback_draft(mentor_id, participant_id, week_number)
+    progress_broker.publish(participant_id, 'feedback', {
+        'week_number': week_number,
+        'ratings': [feedback.participation_rating, feedback.creativity_rating,
+                    feedback.collaboration_rating, feedback.initiative_rating]
+    })
+    db.session.flush()
+    return feedback.id
+
+def purge_expired_feedback_drafts():
+    """Delete drafts past their TTL (run through write_queue)"""
+    return FeedbackDraft.query.filter(FeedbackDraft.expires_at <= datetime.utcnow()).delete()
+
+def purge_expired_feedback_drafts_if_due(interval_seconds):
+    """Run the TTL purge at most once per interval in this worker"""
+    global _next_feedback_draft_purge
+    now = time.monotonic()
+    if now < _next_feedback_draft_purge:
+        return
+    _next_feedback_draft_purge = now + interval_seconds
+    write_queue.submit_background(purge_expired_feedback_drafts)
+
+# Course playlist cache
+# Per-worker cache: course_id -> CoursePlaylist, validated against CoursePlaylistVersion
+_playlist_cache = {}
+
+class CoursePlaylist:
+    """Ordered, week-grouped video list for a course with O(1) prev/next lookup"""
+    
+    def __init__(self, course_id, version, videos):
+        self.course_id = course_id
+        self.version = version
+        self.videos = videos
+        self.videos_by_week = {}
+        for video in videos:
+            self.videos_by_week.setdefault(video['week_number'], []).append(video)
+        self.total_duration = sum(video['duration_minutes'] or 0 for video in videos)
+        self._positions = {video['id']: index for index, video in enumerate(videos)}
+    
+    def __len__(self):
+        return len(self.videos)
+    
+    def position(self, video_id):
+        """1-based position of a video in the course, or 0 if not found"""
+        index = self._positions.get(video_id)
+        return index + 1 if index is not None else 0
+    
+    def prev_video(self, video_id):
+        index = self._positions.get(video_id)
+        return self.videos[index - 1] if index else None
+    
+    def next_video(self, video_id):
+        index = self._positions.get(video_id)
+        if index is None or index + 1 >= len(self.videos):
+            return None
+        return self.videos[index + 1]
+
+def get_course_playlist(course_id):
+    """Return the cached playlist for a course, rebuilding it if the version has changed"""
+    version_row = db.session.get(CoursePlaylistVersion, course_id)
+    version = version_row.version if version_row else 0
+    
+    playlist = _playlist_cache.get(course_id)
+    if playlist is not None and playlist.version == version:
+        return playlist
+    
+    rows = db.session.query(
+        Video.id, Video.title, Video.description, Video.video_url, Video.duration_minutes,
+        Video.week_number, Video.order_in_week, Video.thumbnail_url
+    ).filter_by(course_id=course_id).order_by(Video.week_number, Video.order_in_week).all()
+    
+    playlist = CoursePlaylist(course_id, version, [dict(row._mapping) for row in rows])
+    _playlist_cache[course_id] = playlist
+    return playlist
+
+@event.listens_for(Session, 'after_flush')
+def bump_playlist_versions(session, flush_context):
+    """Bump the playlist version of every course whose videos changed in this flush"""
+    course_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Video):
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        # Include the previous course when a video is moved between courses
+        previous = inspect(obj).attrs.course_id.history.deleted or ()
+        course_ids.update(cid for cid in (obj.course_id, *previous) if cid)
+    
+    if not course_ids:
+        return
+    
+    table = CoursePlaylistVersion.__table__
+    connection = session.connection()
+    for course_id in course_ids:
+        result = connection.execute(
+            table.update().where(table.c.course_id == course_id).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(course_id=course_id, version=1))
+
+# Live progress feed
+def purge_expired_progress_events(retention_seconds):
+    """Delete progress events older than the retention window (run through write_queue)"""
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    # Always keep the newest event so readers can tell when they fell behind the purge
+    newest_id = db.session.query(db.func.max(ProgressEvent.id)).scalar() or 0
+    return ProgressEvent.query.filter(ProgressEvent.created_at < cutoff, ProgressEvent.id < newest_id).delete()
+
+class ProgressSubscription:
+    """A single SSE connection's bounded event queue"""
+    
+    EVENT_TYPES = frozenset(('progress', 'completion'))
+    
+    def __init__(self, user_id, participant_ids, max_queue):
+        self.user_id = user_id
+        self.participant_ids = frozenset(participant_ids)
+        self.events = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+    
+    def deliver(self, event):
+        """Queue an event without blocking; a full queue marks the subscriber for resync"""
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+class ProgressBroker:
+    """In-process pub/sub for participant progress events.
+    
+    Events are written to the ProgressEvent table in the publisher's transaction.
+    Each worker runs one poller thread that reads new rows and fans them out to
+    its local subscribers, so the database acts as the cross-worker broker.
+    """
+    
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._poller = None
+        self._last_event_id = 0
+        self._next_purge = 0.0
+    
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('PROGRESS_FEED_POLL_SECONDS', 1.0)
+        app.config.setdefault('PROGRESS_FEED_HEARTBEAT_SECONDS', 15)
+        app.config.setdefault('PROGRESS_FEED_MAX_STREAM_SECONDS', 600)
+        app.config.setdefault('PROGRESS_FEED_QUEUE_SIZE', 100)
+        app.config.setdefault('PROGRESS_FEED_MAX_CONNECTIONS', 50)
+        app.config.setdefault('PROGRESS_FEED_RESERVED_THREADS', 4)
+        app.config.setdefault('WORKER_THREADS', 16)
+        app.config.setdefault('PROGRESS_FEED_MAX_PER_USER', 3)
+        app.config.setdefault('PROGRESS_FEED_RETENTION_SECONDS', 300)
+        app.config.setdefault('PROGRESS_FEED_PURGE_INTERVAL_SECONDS', 60)
+    
+    def publish(self, participant_id, event_type, data):
+        """Record an event; it is delivered once the caller commits"""
+        db.session.add(ProgressEvent(
+            participant_id=participant_id,
+            event_type=event_type,
+            payload=json.dumps(data, default=str)
+        ))
+    
+    def purge_if_due(self):
+        """Trim the event log at most once per interval in this worker, with or without subscribers"""
+        config = self.app.config
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + config['PROGRESS_FEED_PURGE_INTERVAL_SECONDS']
+        write_queue.submit_background(purge_expired_progress_events, config['PROGRESS_FEED_RETENTION_SECONDS'])
+    
+    def stream_capacity(self):
+        """Streams this worker may hold: each pins a thread, so some are kept for page requests.
+        
+        Site-wide that is WEB_CONCURRENCY x (WORKER_THREADS - PROGRESS_FEED_RESERVED_THREADS)
+        live dashboards (2 x 12 with the gunicorn.conf.py defaults).
+        """
+        config = self.app.config
+        available = config['WORKER_THREADS'] - config['PROGRESS_FEED_RESERVED_THREADS']
+        return max(0, min(config['PROGRESS_FEED_MAX_CONNECTIONS'], available))
+    
+    def stream_count(self):
+        return len(self._subscribers)
+    
+    def subscribe(self, user_id, participant_ids):
+        """Register a subscriber, or return None if a connection limit is reached"""
+        config = self.app.config
+        with self._lock:
+            if len(self._subscribers) >= self.stream_capacity():
+                return None
+            user_connections = sum(1 for sub in self._subscribers if sub.user_id == user_id)
+            if user_connections >= config['PROGRESS_FEED_MAX_PER_USER']:
+                return None
+            
+            subscription = ProgressSubscription(user_id, participant_ids, config['PROGRESS_FEED_QUEUE_SIZE'])
+            self._subscribers.add(subscription)
+            self._ensure_poller()
+            return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def _ensure_poller(self):
+        if self._poller is None or not self._poller.is_alive():
+            with self.app.app_context():
+                self._last_event_id = db.session.query(db.func.max(ProgressEvent.id)).scalar() or 0
+                db.session.remove()
+            self._poller = threading.Thread(target=self._poll_loop, name='progress-feed-poller', daemon=True)
+            self._poller.start()
+    
+    def _poll_loop(self):
+        config = self.app.config
+        while True:
+            time.sleep(config['PROGRESS_FEED_POLL_SECONDS'])
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            
+            try:
+                with self.app.app_context():
+                    self._dispatch_new_events()
+                    db.session.remove()
+            except Exception as e:
+                logging.error(f"Progress feed poll error: {e}")
+    
+    def _dispatch_new_events(self):
+        events = ProgressEvent.query.filter(
+            ProgressEvent.id > self._last_event_id
+        ).order_by(ProgressEvent.id).limit(500).all()
+        if not events:
+            return
+        
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            message = {'id': event.id, 'type': event.event_type, 'data': event.payload}
+            for subscription in subscribers:
+                if event.participant_id in subscription.participant_ids and event.event_type in subscription.EVENT_TYPES:
+                    subscription.deliver(message)
+        self._last_event_id = events[-1].id
+
+progress_broker = ProgressBroker()
+
+def format_sse(data, event=None, event_id=None):
+    """Format a Server-Sent Events message"""
+    message = ''
+    if event_id is not None:
+        message += f'id: {event_id}\n'
+    if event:
+        message += f'event: {event}\n'
+    return message + f'data: {data}\n\n'
+
+# Leaderboards
+class RankTree:
+    """Order-statistic index over integer scores: a Fenwick tree of counts per score
+    plus the members holding each score, kept sorted. Updates and rank lookups are
+    O(log S) for a score range S; top-N walks distinct scores from the top in
+    O(log S) each and reads only the members it returns from each tie bucket.
+    """
+    
+    def __init__(self, size=64):
+        self._size = size
+        self._tree = [0] * (size + 1)
+        self._buckets = {}
+        self._scores = {}
+    
+    def __len__(self):
+        return len(self._scores)
+    
+    def _add(self, score, delta):
+        index = score + 1
+        while index <= self._size:
+            self._tree[index] += delta
+            index += index & -index
+    
+    def _count_at_most(self, score):
+        index = min(score + 1, self._size)
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+    
+    def _kth_smallest_score(self, k):
+        position = 0
+        step = 1 << (self._size.bit_length() - 1)
+        while step:
+            following = position + step
+            if following <= self._size and self._tree[following] < k:
+                position = following
+                k -= self._tree[following]
+            step >>= 1
+        return position
+    
+    def _grow(self, score):
+        while self._size <= score:
+            self._size *= 2
+        self._tree = [0] * (self._size + 1)
+        for bucket_score, members in self._buckets.items():
+            self._add(bucket_score, len(members))
+    
+    def set(self, member, score):
+        previous = self._scores.get(member)
+        if previous == score:
+            return
+        if previous is not None:
+            self.remove(member)
+        if score >= self._size:
+            self._grow(score)
+        self._scores[member] = score
+        bisect.insort(self._buckets.setdefault(score, []), member)
+        self._add(score, 1)
+    
+    def remove(self, member):
+        score = self._scores.pop(member, None)
+        if score is None:
+            return
+        bucket = self._buckets[score]
+        del bucket[bisect.bisect_left(bucket, member)]
+        if not bucket:
+            del self._buckets[score]
+        self._add(score, -1)
+    
+    def score(self, member):
+        return self._scores.get(member)
+    
+    def rank(self, member):
+        """1-based competition rank (ties share a rank), or None if not ranked"""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return len(self._scores) - self._count_at_most(score) + 1
+    
+    def top(self, limit):
+        """Return [(member, score, rank)] for the highest scores, ties by member id"""
+        results = []
+        ahead = 0
+        total = len(self._scores)
+        while len(results) < limit and ahead < total:
+            score = self._kth_smallest_score(total - ahead)
+            bucket = self._buckets[score]
+            for member in bucket[:limit - len(results)]:
+                results.append((member, score, ahead + 1))
+            ahead += len(bucket)
+        return results
+
+class Leaderboards:
+    """Per-SDG and per-SDG-and-school rankings by completion and mentor rating.
+    
+    Boards live in memory in each worker. sync() catches up on the progress event
+    log (registrations, video completions, feedback, rebuild requests) and reloads
+    each affected participant from the tables, so replaying an event is harmless
+    and every worker converges on the same boards. A worker that finds events it
+    never saw were already purged rebuilds from the tables instead.
+    
+    Event ids are not committed in id order on PostgreSQL: a transaction can take
+    an id and commit after a later one. sync() therefore also re-reads events
+    created within LEADERBOARD_REORDER_WINDOW_SECONDS and applies each id once.
+    """
+    
+    METRICS = ('completion', 'rating')
+    EVENT_TYPES = frozenset(('participant_joined', 'progress', 'feedback'))
+    
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._boards = {}
+        self._participants = {}
+        # None until the first rebuild in this worker
+        self._last_event_id = None
+        # event id -> created_at for events applied within the reorder window
+        self._recent_event_ids = {}
+    
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('LEADERBOARD_BATCH_SIZE', 500)
+        app.config.setdefault('LEADERBOARD_REORDER_WINDOW_SECONDS', 30)
+    
+    @staticmethod
+    def school_key(school):
+        school = (school or '').strip().lower()
+        return school or None
+    
+    @staticmethod
+    def metric_score(metric, state):
+        """Integer board score: completed videos, or average rating x100"""
+        if metric == 'completion':
+            return state['completed']
+        if state['rating_count']:
+            return round(state['rating_total'] / state['rating_count'] * 100)
+        return None
+    
+    @staticmethod
+    def feedback_rating(ratings):
+        """Mean of the ratings given in one feedback, or None if none were given"""
+        ratings = [rating for rating in ratings if rating]
+        return sum(ratings) / len(ratings) if ratings else None
+    
+    @staticmethod
+    def _scopes(state):
+        scopes = [(state['sdg'], None)]
+        if state['school']:
+            scopes.append((state['sdg'], state['school']))
+        return scopes
+    
+    def _apply(self, boards, participant_id, state):
+        for metric in self.METRICS:
+            score = self.metric_score(metric, state)
+            for scope in self._scopes(state):
+                board = boards.setdefault((metric,) + scope, RankTree())
+                if score is None:
+                    board.remove(participant_id)
+                else:
+                    board.set(participant_id, score)
+    
+    def _replace(self, participant_id, state):
+        """Swap in a freshly loaded state (caller holds the lock)"""
+        previous = self._participants.get(participant_id)
+        if previous is not None:
+            for scope in set(self._scopes(previous)) - set(self._scopes(state)):
+                for metric in self.METRICS:
+                    board = self._boards.get((metric,) + scope)
+                    if board is not None:
+                        board.remove(participant_id)
+        self._participants[participant_id] = state
+        self._apply(self._boards, participant_id, state)
+    
+    def _new_state(self, chosen_sdg, school, first_name, last_name):
+        return {
+            'sdg': chosen_sdg,
+            'school': self.school_key(school),
+            'name': f"{first_name} {last_name[:1]}.",
+            'completed': 0,
+            'rating_total': 0.0,
+            'rating_count': 0
+        }
+    
+    def _load_states(self, *criteria, limit=None):
+        """Load {participant_id: state} with completion and rating totals for matching profiles"""
+        query = db.session.query(
+            ParticipantProfile.id, ParticipantProfile.chosen_sdg, ParticipantProfile.school_organization,
+            User.first_name, User.last_name
+        ).join(User, ParticipantProfile.user_id == User.id).filter(*criteria).order_by(ParticipantProfile.id)
+        if limit:
+            query = query.limit(limit)
+        states = {row.id: self._new_state(*row[1:]) for row in query.all()}
+        if not states:
+            return states
+        
+        progress_table = CourseProgress.__table__
+        video_progress_table = VideoProgress.__table__
+        feedback_table = MentorFeedback.__table__
+        completions = db.session.execute(
+            select(progress_table.c.participant_id, db.func.count(video_progress_table.c.id))
+            .join(progress_table, video_progress_table.c.course_progress_id == progress_table.c.id)
+            .where(progress_table.c.participant_id.in_(states), video_progress_table.c.is_completed == True)
+            .group_by(progress_table.c.participant_id)
+        ).all()
+        for participant_id, completed in completions:
+            states[participant_id]['completed'] = completed
+        
+        feedback_rows = db.session.execute(
+            select(feedback_table.c.participant_id, feedback_table.c.participation_rating,
+                   feedback_table.c.creativity_rating, feedback_table.c.collaboration_rating,
+                   feedback_table.c.initiative_rating)
+            .where(feedback_table.c.participant_id.in_(states))
+        ).all()
+        for participant_id, *ratings in feedback_rows:
+            rating = self.feedback_rating(ratings)
+            if rating is not None:
+                states[participant_id]['rating_total'] += rating
+                states[participant_id]['rating_count'] += 1
+        return states
+    
+    def rebuild(self):
+        """Recompute all boards from the database in batches of participants"""
+        # Events after this id are replayed by sync(). Replaying only reloads the
+        # participant, so events that the table reads below also saw are not counted twice.
+        last_event_id = db.session.query(db.func.max(ProgressEvent.id)).scalar() or 0
+        recent_event_ids = dict(db.session.query(ProgressEvent.id, ProgressEvent.created_at).filter(
+            ProgressEvent.id <= last_event_id, ProgressEvent.created_at >= self._reorder_cutoff()
+        ).all())
+        batch_size = self.app.config['LEADERBOARD_BATCH_SIZE']
+        participants = {}
+        boards = {}
+        last_id = 0
+        while True:
+            batch = self._load_states(ParticipantProfile.id > last_id, limit=batch_size)
+            if not batch:
+                break
+            for participant_id, state in batch.items():
+                self._apply(boards, participant_id, state)
+            participants.update(batch)
+            last_id = max(batch)
+        
+        with self._lock:
+            self._participants = participants
+            self._boards = boards
+            self._last_event_id = last_event_id
+            self._recent_event_ids = recent_event_ids
+        logging.info(f"Leaderboards rebuilt for {len(participants)} participants")
+    
+    def _reorder_cutoff(self):
+        return datetime.utcnow() - timedelta(seconds=self.app.config['LEADERBOARD_REORDER_WINDOW_SECONDS'])
+    
+    def _event_query(self):
+        return db.session.query(
+            ProgressEvent.id, ProgressEvent.event_type, ProgressEvent.participant_id, ProgressEvent.created_at
+        ).order_by(ProgressEvent.id)
+    
+    def _apply_events(self, events, cutoff):
+        """Reload the participants the events touch (or rebuild if one asks for it)"""
+        if any(event.event_type == 'leaderboard_rebuild' for event in events):
+            self.rebuild()
+            return
+        participant_ids = {event.participant_id for event in events
+                           if event.event_type in self.EVENT_TYPES and event.participant_id is not None}
+        states = self._load_states(ParticipantProfile.id.in_(participant_ids)) if participant_ids else {}
+        with self._lock:
+            for participant_id, state in states.items():
+                self._replace(participant_id, state)
+            self._last_event_id = max(self._last_event_id, events[-1].id)
+            self._recent_event_ids.update(
+                (event.id, event.created_at) for event in events if event.created_at and event.created_at >= cutoff
+            )
+    
+    def sync(self):
+        """Bring this worker's boards up to date with the progress event log"""
+        with self._sync_lock:
+            if self._last_event_id is None:
+                # The startup rebuild did not run in this worker
+                self.rebuild()
+            oldest_id = db.session.query(db.func.min(ProgressEvent.id)).scalar()
+            if oldest_id is not None and oldest_id > self._last_event_id + 1:
+                logging.info("Leaderboard events were purged before this worker read them; rebuilding")
+                self.rebuild()
+            
+            cutoff = self._reorder_cutoff()
+            with self._lock:
+                self._recent_event_ids = {event_id: created_at for event_id, created_at in self._recent_event_ids.items()
+                                          if created_at >= cutoff}
+            # Late commits: ids at or below the watermark that this worker has not applied yet
+            late_events = [event for event in self._event_query().filter(
+                ProgressEvent.id <= self._last_event_id, ProgressEvent.created_at >= cutoff
+            ) if event.id not in self._recent_event_ids]
+            if late_events:
+                self._apply_events(late_events, cutoff)
+            
+            batch_size = self.app.config['LEADERBOARD_BATCH_SIZE']
+            while True:
+                events = self._event_query().filter(ProgressEvent.id > self._last_event_id).limit(batch_size).all()
+                if not events:
+                    break
+                self._apply_events(events, cutoff)
+                if len(events) < batch_size:
+                    break
+    
+    def top(self, metric, sdg, school=None, limit=10):
+        with self._lock:
+            board = self._boards.get((metric, sdg, self.school_key(school)))
+            if board is None:
+                return []
+            return [self._entry(metric, participant_id, score, rank)
+                    for participant_id, score, rank in board.top(limit)]
+    
+    def standing(self, metric, participant_id):
+        """A participant's rank within their SDG and within their SDG and school"""
+        with self._lock:
+            state = self._participants.get(participant_id)
+            if state is None:
+                return None
+            result = {}
+            for scope, key in (('sdg', (metric, state['sdg'], None)),
+                               ('school', (metric, state['sdg'], state['school']))):
+                board = self._boards.get(key)
+                if (scope == 'school' and key[2] is None) or board is None or board.rank(participant_id) is None:
+                    result[scope] = None
+                    continue
+                entry = self._entry(metric, participant_id, board.score(participant_id), board.rank(participant_id))
+                entry['out_of'] = len(board)
+                result[scope] = entry
+            return result
+    
+    def _entry(self, metric, participant_id, score, rank):
+        return {
+            'rank': rank,
+            'participant_id': participant_id,
+            'name': self._participants[participant_id]['name'],
+            'score': score / 100 if metric == 'rating' else score
+        }
+
+leaderboards = Leaderboards()
+
+# Admission control
+class SharedTokenBuckets:
+    """Token buckets in a small memory-mapped table shared by all worker processes.
+    
+    Each slot holds (key hash, tokens, last refill time). Keys are placed by open
+    addressing; idle slots are reused. Without fcntl the table is per-process.
+    """
+    
+    SLOT = struct.Struct('<Qdd')
+    MAX_PROBES = 16
+    
+    def __init__(self, path, slots=4096, idle_seconds=600):
+        self.path = path
+        self.slots = slots
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._fd = None
+        self._map = None
+        self._pid = None
+    
+    def _open(self):
+        # Reopen after fork so each worker has its own file descriptor
+        if self._pid == os.getpid():
+            return
+        size = self.SLOT.size * self.slots
+        if fcntl is None:
+            self._map = bytearray(size)
+        else:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+        self._pid = os.getpid()
+    
+    def consume(self, key, rate, burst):
+        """Take one token for key. Returns 0 if allowed, else seconds until a token is available."""
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+        now = time.time()
+        
+        with self._lock:
+            self._open()
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset = self._find_slot(key_hash, now)
+                if offset is None:
+                    # Table is saturated: fail open rather than reject legitimate traffic
+                    return 0
+                
+                slot_key, tokens, updated = self.SLOT.unpack_from(self._map, offset)
+                if slot_key != key_hash:
+                    tokens, updated = burst, now
+                tokens = min(burst, tokens + (now - updated) * rate)
+                
+                retry_after = 0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    retry_after = (1 - tokens) / rate
+                self.SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+                return retry_after
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    def _find_slot(self, key_hash, now):
+        free_offset = None
+        for probe in range(self.MAX_PROBES):
+            offset = ((key_hash + probe) % self.slots) * self.SLOT.size
+            slot_key, _, updated = self.SLOT.unpack_from(self._map, offset)
+            if slot_key == key_hash:
+                return offset
+            if free_offset is None and (slot_key == 0 or now - updated > self.idle_seconds):
+                free_offset = offset
+        return free_offset
+
+class AdmissionController:
+    """Per-user/per-endpoint rate limits plus load shedding of background endpoints.
+    
+    Endpoints are opted in through ADMISSION_POLICIES. Each caller (user, or
+    client address for anonymous requests) has a bucket per endpoint (rate/burst),
+    and each endpoint has an overall bucket across all callers
+    (endpoint_rate/endpoint_burst). Over-budget requests get 429; while this
+    worker is overloaded (too many threads busy, counting open streams, or high
+    recent latency) background endpoints get 503 so page loads stay responsive.
+    """
+    
+    DEFAULT_POLICIES = {
+        'mark_video_complete': {'rate': 1.0, 'burst': 10, 'endpoint_rate': 50, 'endpoint_burst': 200, 'priority': 'background'},
+        'api_save_feedback_draft': {'rate': 0.5, 'burst': 5, 'endpoint_rate': 20, 'endpoint_burst': 100, 'priority': 'background'},
+        'mentor_progress_stream': {'rate': 0.2, 'burst': 5, 'endpoint_rate': 2, 'endpoint_burst': 20, 'priority': 'background',
+                                   'long_lived': True},
+        'submit_feedback': {'rate': 0.2, 'burst': 5, 'endpoint_rate': 5, 'endpoint_burst': 50, 'priority': 'interactive'},
+        'submit_reflection': {'rate': 0.2, 'burst': 5, 'endpoint_rate': 5, 'endpoint_burst': 50, 'priority': 'interactive'},
+        'login': {'rate': 0.2, 'burst': 10, 'endpoint_rate': 20, 'endpoint_burst': 100, 'priority': 'interactive',
+                  'methods': {'POST'}},
+        'register': {'rate': 0.05, 'burst': 5, 'endpoint_rate': 2, 'endpoint_burst': 20, 'priority': 'interactive',
+                     'methods': {'POST'}}
+    }
+    
+    def __init__(self):
+        self.app = None
+        self.buckets = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency_ewma = 0.0
+    
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('ADMISSION_CONTROL', True)
+        app.config.setdefault('ADMISSION_POLICIES', self.DEFAULT_POLICIES)
+        app.config.setdefault('ADMISSION_SHM_PATH', os.path.join(app.instance_path, 'admission.bin'))
+        app.config.setdefault('ADMISSION_MAX_IN_FLIGHT', app.config.get('WORKER_THREADS', 16) - 2)
+        app.config.setdefault('ADMISSION_LATENCY_THRESHOLD_MS', 1000)
+        if not app.config['ADMISSION_CONTROL']:
+            return
+        
+        self.buckets = SharedTokenBuckets(app.config['ADMISSION_SHM_PATH'])
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+    
+    def overloaded(self):
+        config = self.app.config
+        # Open SSE streams are not in _in_flight but each still pins a worker thread
+        busy_threads = self._in_flight + progress_broker.stream_count()
+        return (busy_threads > config['ADMISSION_MAX_IN_FLIGHT'] or
+                self._latency_ewma * 1000 > config['ADMISSION_LATENCY_THRESHOLD_MS'])
+    
+    def before_request(self):
+        policy = self.app.config['ADMISSION_POLICIES'].get(request.endpoint)
+        if policy and request.method not in policy.get('methods', (request.method,)):
+            policy = None
+        
+        if not (policy and policy.get('long_lived')):
+            g.admission_started = time.monotonic()
+            with self._lock:
+                self._in_flight += 1
+        
+        if policy is None:
+            return None
+        
+        if policy['priority'] == 'background' and self.overloaded():
+            return self.reject(503, 'Server busy, please retry shortly', 5)
+        
+        # remote_addr is the client's address once ProxyFix has applied X-Forwarded-For
+        identity = f'user:{current_user.id}' if current_user.is_authenticated else f'ip:{request.remote_addr}'
+        retry_after = self.buckets.consume(f'{request.endpoint}:{identity}', policy['rate'], policy['burst'])
+        if not retry_after and 'endpoint_rate' in policy:
+            retry_after = self.buckets.consume(request.endpoint, policy['endpoint_rate'], policy['endpoint_burst'])
+        if retry_after:
+            return self.reject(429, 'Too many requests', retry_after)
+        return None
+    
+    def teardown_request(self, exception=None):
+        started = g.pop('admission_started', None)
+        if started is None:
+            return
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._in_flight -= 1
+            self._latency_ewma = 0.9 * self._latency_ewma + 0.1 * elapsed
+    
+    @staticmethod
+    def reject(status, message, retry_after):
+        response = jsonify({'error': message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+admission_controller = AdmissionController()
+
+# Request profiler
+class ProfileCapture:
+    """Samples one request thread's call stack and records the SQL it issues"""
+    
+    def __init__(self, name, thread_id, interval):
+        self.name = name
+        self.thread_id = thread_id
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.finished = None
+        self.stacks = {}
+        self.statements = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f'profiler-{name}', daemon=True)
+    
+    def start(self):
+        self._sampler.start()
+    
+    def stop(self):
+        self.finished = time.perf_counter()
+        self._stop.set()
+        self._sampler.join()
+    
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                stack = tuple(reversed(stack))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+    
+    def to_speedscope(self, title):
+        """Build a speedscope file: a sampled CPU profile plus an evented SQL timeline"""
+        frames = []
+        frame_index = {}
+        
+        def index_of(frame):
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                name, filename, line = frame
+                frames.append({'name': name, 'file': filename, 'line': line})
+            return frame_index[frame]
+        
+        interval_ms = self.interval * 1000
+        samples = [[index_of(frame) for frame in stack] for stack in self.stacks]
+        weights = [count * interval_ms for count in self.stacks.values()]
+        duration_ms = (self.finished - self.started) * 1000
+        
+        events = []
+        for statement, start, end in self.statements:
+            frame = index_of((statement, 'sql', 0))
+            events.append({'type': 'O', 'frame': frame, 'at': (start - self.started) * 1000})
+            events.append({'type': 'C', 'frame': frame, 'at': (end - self.started) * 1000})
+        
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': title,
+            'exporter': 'talyouth-profiler',
+            'shared': {'frames': frames},
+            'profiles': [
+                {'type': 'sampled', 'name': f'{title} (Python)', 'unit': 'milliseconds',
+                 'startValue': 0, 'endValue': sum(weights), 'samples': samples, 'weights': weights},
+                {'type': 'evented', 'name': f'{title} (SQL)', 'unit': 'milliseconds',
+                 'startValue': 0, 'endValue': duration_ms, 'events': events}
+            ]
+        }
+
+class RequestProfiler:
+    """Admin-gated per-request profiler.
+    
+    A request is profiled when it sends X-Profile-Request with PROFILER_TOKEN, or
+    when it falls within PROFILER_SAMPLE_RATE. Browsers reach the capture list by
+    entering the token once (sign_in), which marks their session. With no token and a zero sample
+    rate no hooks are installed at all; the SQL listener is only attached while
+    a capture is running.
+    """
+    
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._active = {}
+    
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('PROFILER_TOKEN', None)
+        app.config.setdefault('PROFILER_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILER_INTERVAL_MS', 1)
+        app.config.setdefault('PROFILER_DIR', os.path.join(app.instance_path, 'profiles'))
+        app.config.setdefault('PROFILER_KEEP', 50)
+        if not (app.config['PROFILER_TOKEN'] or app.config['PROFILER_SAMPLE_RATE']):
+            return
+        
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+    
+    def _token_matches(self, supplied):
+        token = self.app.config['PROFILER_TOKEN']
+        if not (token and supplied):
+            return False
+        return hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+    
+    def _session_marker(self):
+        # Bound to the current token, so rotating PROFILER_TOKEN signs every browser out
+        token = self.app.config['PROFILER_TOKEN'].encode('utf-8')
+        return hmac.new(self.app.secret_key.encode('utf-8'), token, hashlib.sha256).hexdigest()
+    
+    def wants_capture(self):
+        """True when this request asks to be profiled with the X-Profile-Request header"""
+        return self._token_matches(request.headers.get('X-Profile-Request'))
+    
+    def is_admin(self):
+        if self.wants_capture():
+            return True
+        marker = session.get('profiler_admin')
+        if not (self.app.config['PROFILER_TOKEN'] and marker):
+            return False
+        return hmac.compare_digest(marker, self._session_marker())
+    
+    def sign_in(self, supplied):
+        """Mark the session as a profiler admin if the token is right"""
+        if not self._token_matches(supplied):
+            return False
+        session['profiler_admin'] = self._session_marker()
+        return True
+    
+    def before_request(self):
+        if request.endpoint in ('profile_index', 'profile_download', 'static'):
+            return
+        if not (self.wants_capture() or random.random() < self.app.config['PROFILER_SAMPLE_RATE']):
+            return
+        
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{request.endpoint or 'unknown'}"
+        capture = ProfileCapture(name, threading.get_ident(), self.app.config['PROFILER_INTERVAL_MS'] / 1000)
+        with self._lock:
+            if not self._active:
+                event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._active[capture.thread_id] = capture
+        g.profile_capture = capture
+        capture.start()
+    
+    def after_request(self, response):
+        capture = g.get('profile_capture')
+        if capture is not None:
+            response.headers['X-Profile-Id'] = capture.name
+        return response
+    
+    def teardown_request(self, exception=None):
+        capture = g.pop('profile_capture', None)
+        if capture is None:
+            return
+        capture.stop()
+        with self._lock:
+            self._active.pop(capture.thread_id, None)
+            if not self._active:
+                event.remove(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.remove(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+        
+        try:
+            self.save(capture, f'{request.method} {request.full_path.rstrip("?")}')
+        except Exception as e:
+            logging.error(f"Error saving request profile: {e}")
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() in self._active:
+            conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        capture = self._active.get(threading.get_ident())
+        starts = conn.info.get('profile_query_start')
+        if capture is not None and starts:
+            capture.statements.append((statement, starts.pop(), time.perf_counter()))
+    
+    def save(self, capture, title):
+        directory = self.app.config['PROFILER_DIR']
+        os.makedirs(directory, exist_ok=True)
+        
+        with open(os.path.join(directory, f'{capture.name}.speedscope.json'), 'wb') as f:
+            f.write(encode_json(capture.to_speedscope(title)))
+        
+        sql_ms = sum(end - start for _, start, end in capture.statements) * 1000
+        summary = {
+            'name': capture.name,
+            'title': title,
+            'captured_at': datetime.utcnow().isoformat(),
+            'duration_ms': round((capture.finished - capture.started) * 1000, 1),
+            'sql_count': len(capture.statements),
+            'sql_ms': round(sql_ms, 1),
+            'samples': sum(capture.stacks.values())
+        }
+        with open(os.path.join(directory, f'{capture.name}.summary.json'), 'w') as f:
+            json.dump(summary, f)
+        
+        # Keep only the most recent captures
+        summaries = sorted(name for name in os.listdir(directory) if name.endswith('.summary.json'))
+        for old in summaries[:-self.app.config['PROFILER_KEEP']]:
+            base = old[:-len('.summary.json')]
+            for suffix in ('.summary.json', '.speedscope.json'):
+                try:
+                    os.remove(os.path.join(directory, base + suffix))
+                except OSError:
+                    pass
+    
+    def recent(self):
+        directory = self.app.config['PROFILER_DIR']
+        if not os.path.isdir(directory):
+            return []
+        captures = []
+        for name in sorted(os.listdir(directory), reverse=True):
+            if name.endswith('.summary.json'):
+                with open(os.path.join(directory, name)) as f:
+                    captures.append(json.load(f))
+        return captures
+
+request_profiler = RequestProfiler()
+
+# Catalog API
+CATALOG_DEFAULT_LIMIT = 20
+CATALOG_MAX_LIMIT = 100
+CATALOG_MAX_INCLUDED_VIDEOS = 50
+
+SDG_FIELDS = ('number', 'title', 'description', 'color')
+THEME_FIELDS = ('name', 'title', 'description')
+WEEK_FIELDS = ('theme', 'number', 'title', 'description', 'activities')
+COURSE_FIELDS = ('id', 'title', 'description', 'sdg_focus', 'difficulty_level', 'duration_weeks',
+                 'thumbnail_url', 'created_at', 'is_active')
+VIDEO_FIELDS = ('id', 'course_id', 'title', 'description', 'video_url', 'duration_minutes',
+                'week_number', 'order_in_week', 'thumbnail_url', 'created_at')
+
+class CatalogQueryError(ValueError):
+    """Invalid catalog API query parameter (returned as a 400)"""
+
+def encode_json(payload):
+    """Serialize an API payload to JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'),
+                      default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value)).encode('utf-8')
+
+def catalog_response(payload, private=False):
+    """Build a JSON response with an ETag, answering 304 when the client copy is current"""
+    response = current_app.response_class(encode_json(payload), mimetype='application/json')
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+def encode_cursor(value):
+    return base64.urlsafe_b64encode(str(value).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        value = int(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError):
+        raise CatalogQueryError('Invalid cursor')
+    if value < 0:
+        # A negative offset would slice from the end of the list
+        raise CatalogQueryError('Invalid cursor')
+    return value
+
+def parse_limit():
+    limit = request.args.get('limit', CATALOG_DEFAULT_LIMIT)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise CatalogQueryError('limit must be an integer')
+    return max(1, min(limit, CATALOG_MAX_LIMIT))
+
+def parse_fields(resource, allowed, primary=True):
+    """Read fields[resource]= (or fields= for the primary resource) and validate it"""
+    raw = request.args.get(f'fields[{resource}]')
+    if raw is None and primary:
+        raw = request.args.get('fields')
+    if not raw:
+        return list(allowed)
+    
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise CatalogQueryError(f"Unknown {resource} fields: {', '.join(unknown)}")
+    return fields
+
+def parse_include(allowed):
+    raw = request.args.get('include', '')
+    includes = {item.strip() for item in raw.split(',') if item.strip()}
+    unknown = includes - set(allowed)
+    if unknown:
+        raise CatalogQueryError(f"Unknown include: {', '.join(sorted(unknown))}")
+    return includes
+
+def paginate_list(items):
+    """Cursor-paginate an in-memory list (XML-backed resources)"""
+    limit = parse_limit()
+    cursor = request.args.get('cursor')
+    offset = decode_cursor(cursor) if cursor else 0
+    page = items[offset:offset + limit]
+    next_cursor = encode_cursor(offset + limit) if offset + limit < len(items) else None
+    return page, next_cursor
+
+def project(item, fields):
+    return {field: item[field] for field in fields}
+
+def paginate_table(table, fields, *criteria):
+    """Keyset-paginate a table by id, selecting only the requested columns"""
+    limit = parse_limit()
+    cursor = request.args.get('cursor')
+    
+    columns = [table.c.id] + [table.c[field] for field in fields if field != 'id']
+    stmt = select(*columns).where(*criteria)
+    if cursor:
+        stmt = stmt.where(table.c.id > decode_cursor(cursor))
+    rows = db.session.execute(stmt.order_by(table.c.id).limit(limit + 1)).all()
+    
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    rows = rows[:limit]
+    return [row.id for row in rows], [project(row._mapping, fields) for row in rows], next_cursor
+
+def load_course_videos(course_ids, fields):
+    """Return ({course_id: [video, ...]}, truncated course ids), capped per course in SQL"""
+    table = Video.__table__
+    columns = [table.c.id, table.c.course_id] + [table.c[field] for field in fields if field not in ('id', 'course_id')]
+    position = db.func.row_number().over(
+        partition_by=table.c.course_id, order_by=(table.c.week_number, table.c.order_in_week, table.c.id)
+    ).label('position')
+    ranked = select(*columns, position).where(table.c.course_id.in_(course_ids)).subquery()
+    # One row past the cap tells us the course has more videos than were included
+    rows = db.session.execute(
+        select(ranked).where(ranked.c.position <= CATALOG_MAX_INCLUDED_VIDEOS + 1)
+        .order_by(ranked.c.course_id, ranked.c.position)
+    ).all()
+    
+    videos = {course_id: [] for course_id in course_ids}
+    truncated = set()
+    for row in rows:
+        if row.position > CATALOG_MAX_INCLUDED_VIDEOS:
+            truncated.add(row.course_id)
+            continue
+        video = project(row._mapping, fields)
+        video['_id'] = row.id
+        videos[row.course_id].append(video)
+    return videos, truncated
+
+def load_participant_progress(participant_id, course_ids):
+    """Return ({course_id: progress}, completed video ids) for one participant"""
+    progress_table = CourseProgress.__table__
+    video_progress_table = VideoProgress.__table__
+    
+    progress_rows = db.session.execute(
+        select(progress_table.c.course_id, progress_table.c.completion_percentage, progress_table.c.current_week)
+        .where(progress_table.c.participant_id == participant_id, progress_table.c.course_id.in_(course_ids))
+    ).all()
+    completed_rows = db.session.execute(
+        select(video_progress_table.c.video_id, progress_table.c.course_id)
+        .join(progress_table, video_progress_table.c.course_progress_id == progress_table.c.id)
+        .where(progress_table.c.participant_id == participant_id,
+               progress_table.c.course_id.in_(course_ids),
+               video_progress_table.c.is_completed == True)
+    ).all()
+    
+    progress = {row.course_id: {
+        'completion_percentage': row.completion_percentage,
+        'current_week': row.current_week,
+        'completed_video_ids': []
+    } for row in progress_rows}
+    completed = set()
+    for row in completed_rows:
+        completed.add(row.video_id)
+        if row.course_id in progress:
+            progress[row.course_id]['completed_video_ids'].append(row.video_id)
+    return progress, completed
+
 def initialize_sample_courses():
     """Initialize sample SDG courses with videos"""
+    # Check and insert in one write transaction so concurrent workers don't both seed
+    begin_write()
     if Course.query.count() == 0:
         # SDG 2: Zero Hunger Course
         course_sdg2 = Course(
@@ -355,9 +1863,48 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     
+    # SQLite production mode: WAL, busy timeout and IMMEDIATE write transactions
+    is_sqlite = database_url.startswith("sqlite")
+    app.config["SQLITE_PRODUCTION_MODE"] = is_sqlite and os.environ.get("SQLITE_PRODUCTION_MODE", "").lower() in ("1", "true")
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    # The write queue relies on SAVEPOINTs, which need production mode's explicit BEGIN
+    app.config["SQLITE_WRITE_QUEUE"] = app.config["SQLITE_PRODUCTION_MODE"] and os.environ.get("SQLITE_WRITE_QUEUE", "").lower() in ("1", "true")
+    app.config["FEEDBACK_DRAFT_TTL_HOURS"] = int(os.environ.get("FEEDBACK_DRAFT_TTL_HOURS", 72))
+    app.config["FEEDBACK_DRAFT_PURGE_INTERVAL_SECONDS"] = int(os.environ.get("FEEDBACK_DRAFT_PURGE_INTERVAL_SECONDS", 3600))
+    app.config["PROGRESS_FEED_MAX_CONNECTIONS"] = int(os.environ.get("PROGRESS_FEED_MAX_CONNECTIONS", 50))
+    app.config["PROGRESS_FEED_MAX_PER_USER"] = int(os.environ.get("PROGRESS_FEED_MAX_PER_USER", 3))
+    # Must match gunicorn's thread count (gunicorn.conf.py reads the same variable)
+    app.config["WORKER_THREADS"] = int(os.environ.get("WORKER_THREADS", 16))
+    app.config["PROGRESS_FEED_RESERVED_THREADS"] = int(os.environ.get("PROGRESS_FEED_RESERVED_THREADS", 4))
+    app.config["PROGRESS_FEED_RETENTION_SECONDS"] = int(os.environ.get("PROGRESS_FEED_RETENTION_SECONDS", 300))
+    app.config["PROGRESS_FEED_PURGE_INTERVAL_SECONDS"] = int(os.environ.get("PROGRESS_FEED_PURGE_INTERVAL_SECONDS", 60))
+    app.config["ADMISSION_CONTROL"] = os.environ.get("ADMISSION_CONTROL", "1").lower() in ("1", "true")
+    # Busy threads (requests plus open streams) per worker before background endpoints are shed
+    app.config["ADMISSION_MAX_IN_FLIGHT"] = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", app.config["WORKER_THREADS"] - 2))
+    app.config["ADMISSION_LATENCY_THRESHOLD_MS"] = int(os.environ.get("ADMISSION_LATENCY_THRESHOLD_MS", 1000))
+    # Shared by this app's worker processes only; kept out of the system temp dir other apps share
+    app.config["ADMISSION_SHM_PATH"] = os.environ.get("ADMISSION_SHM_PATH", os.path.join(app.instance_path, "admission.bin"))
+    app.config["PROFILER_TOKEN"] = os.environ.get("PROFILER_TOKEN")
+    app.config["ADMIN_TOKEN"] = os.environ.get("ADMIN_TOKEN")
+    # How long a PostgreSQL transaction may hold an event id before committing and still reach the leaderboards
+    app.config["LEADERBOARD_REORDER_WINDOW_SECONDS"] = int(os.environ.get("LEADERBOARD_REORDER_WINDOW_SECONDS", 30))
+    # Reverse proxies in front of the app (Render's load balancer is one); 0 trusts no X-Forwarded-* headers
+    app.config["PROXY_FIX_HOPS"] = int(os.environ.get("PROXY_FIX_HOPS", 0))
+    app.config["PROFILER_SAMPLE_RATE"] = float(os.environ.get("PROFILER_SAMPLE_RATE", 0))
+    
+    if app.config["PROXY_FIX_HOPS"]:
+        # Per-client rate limits need the client's address, not the proxy's
+        hops = app.config["PROXY_FIX_HOPS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
+    progress_broker.init_app(app)
+    leaderboards.init_app(app)
+    write_queue.init_app(app)
+    request_profiler.init_app(app)
+    admission_controller.init_app(app)
     login_manager.login_view = 'login'
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
@@ -366,10 +1913,19 @@ def create_app():
     def load_user(user_id):
         return User.query.get(int(user_id))
     
+    @app.teardown_appcontext
+    def reset_write_intent(exception=None):
+        end_write()
+    
     # Create tables and initialize data
     with app.app_context():
+        if app.config["SQLITE_PRODUCTION_MODE"]:
+            configure_sqlite_engine(app)
         db.create_all()
         initialize_sample_courses()
+        purge_expired_feedback_drafts_if_due(app.config['FEEDBACK_DRAFT_PURGE_INTERVAL_SECONDS'])
+        # Each worker starts with full boards; requests then only apply new events
+        leaderboards.rebuild()
     
     # Routes
     @app.route('/')
@@ -413,10 +1969,12 @@ def create_app():
             user.set_password(password)
             
             try:
+                begin_write()
                 db.session.add(user)
                 db.session.commit()
                 
                 # Create profile based on user type
+                begin_write()
                 if user_type == 'participant':
                     chosen_sdg = request.form.get('chosen_sdg')
                     school = request.form.get('school_organization')
@@ -429,6 +1987,9 @@ def create_app():
                         availability=availability
                     )
                     db.session.add(profile)
+                    db.session.flush()
+                    # Puts the participant on every worker's leaderboards without a rebuild
+                    progress_broker.publish(profile.id, 'participant_joined', {})
                     
                 elif user_type == 'mentor':
                     expertise = request.form.get('expertise_areas')
@@ -449,6 +2010,7 @@ def create_app():
                     db.session.add(profile)
                 
                 db.session.commit()
+                progress_broker.purge_if_due()
                 
                 flash('Registration successful! Please login to continue.', 'success')
                 return redirect(url_for('login'))
@@ -489,9 +2051,8 @@ def create_app():
                         flash('Your mentor account is pending approval. Please contact admin.', 'warning')
                         return render_template('login.html')
                 
-                # Update last login
-                user.last_login = datetime.utcnow()
-                db.session.commit()
+                # Update last login (queued when the SQLite write queue is enabled)
+                write_queue.submit_background(update_last_login, user.id, datetime.utcnow())
                 
                 # Convert remember_me to boolean (checkbox returns 'on' if checked)
                 remember = request.form.get('remember_me') == 'on'
@@ -564,15 +2125,7 @@ def create_app():
             return redirect(url_for('index'))
         
         course = Course.query.get_or_404(course_id)
-        
-        # Get videos organized by week
-        videos_by_week = {}
-        videos = Video.query.filter_by(course_id=course_id).order_by(Video.week_number, Video.order_in_week).all()
-        
-        for video in videos:
-            if video.week_number not in videos_by_week:
-                videos_by_week[video.week_number] = []
-            videos_by_week[video.week_number].append(video)
+        playlist = get_course_playlist(course_id)
         
         # Get or create course progress for participants
         course_progress = None
@@ -583,16 +2136,18 @@ def create_app():
             ).first()
             
             if not course_progress:
-                course_progress = CourseProgress(
-                    participant_id=current_user.participant_profile.id,
-                    course_id=course_id
-                )
-                db.session.add(course_progress)
-                db.session.commit()
+                # Re-checked inside the write transaction, so concurrent page loads insert one row
+                try:
+                    progress_id = write_queue.run(get_or_create_course_progress, current_user.participant_profile.id, course_id)
+                except IntegrityError:
+                    # Lost the race on a database without BEGIN IMMEDIATE; the row now exists
+                    progress_id = get_or_create_course_progress(current_user.participant_profile.id, course_id)
+                course_progress = db.session.get(CourseProgress, progress_id)
         
         return render_template('course_detail.html', 
                              course=course, 
-                             videos_by_week=videos_by_week,
+                             playlist=playlist,
+                             videos_by_week=playlist.videos_by_week,
                              course_progress=course_progress)
     
     @app.route('/watch/<int:video_id>')
@@ -606,14 +2161,16 @@ def create_app():
         video = Video.query.get_or_404(video_id)
         course = video.course
         
-        # Get other videos in the course for navigation
-        other_videos = Video.query.filter_by(course_id=course.id).order_by(Video.week_number, Video.order_in_week).all()
-
-    
+        # Navigation comes from the cached course playlist
+        playlist = get_course_playlist(course.id)
+        
         return render_template('watch_video.html', 
                              video=video, 
                              course=course,
-                             other_videos=other_videos)
+                             playlist=playlist,
+                             other_videos=playlist.videos,
+                             prev_video=playlist.prev_video(video.id),
+                             next_video=playlist.next_video(video.id))
     
     @app.route('/student-progress')
     @login_required
@@ -706,6 +2263,50 @@ def create_app():
                              all_participants=all_participants,
                              recent_feedback=recent_feedback)
     
+    @app.route('/api/mentor/progress-stream')
+    @login_required
+    def mentor_progress_stream():
+        """Server-Sent Events feed of progress for the mentor's assigned participants"""
+        if current_user.user_type != 'mentor' or not current_user.mentor_profile:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        participant_ids = [participant.id for participant in current_user.mentor_profile.assigned_participants]
+        subscription = progress_broker.subscribe(current_user.id, participant_ids)
+        if subscription is None:
+            response = jsonify({'error': 'Too many live connections'})
+            response.status_code = 429
+            response.headers['Retry-After'] = '30'
+            return response
+        
+        heartbeat = app.config['PROGRESS_FEED_HEARTBEAT_SECONDS']
+        max_stream_seconds = app.config['PROGRESS_FEED_MAX_STREAM_SECONDS']
+        
+        def stream():
+            started = time.monotonic()
+            try:
+                yield 'retry: 5000\n\n'
+                # Close long-lived streams so the browser reconnects and the worker is freed
+                while time.monotonic() - started < max_stream_seconds:
+                    if subscription.overflowed:
+                        # Slow consumer: drop the backlog and ask the client to reload once
+                        subscription.overflowed = False
+                        while not subscription.events.empty():
+                            subscription.events.get_nowait()
+                        yield format_sse('{}', event='resync')
+                    try:
+                        message = subscription.events.get(timeout=heartbeat)
+                    except queue.Empty:
+                        yield ': heartbeat\n\n'
+                        continue
+                    yield format_sse(message['data'], event=message['type'], event_id=message['id'])
+            finally:
+                progress_broker.unsubscribe(subscription)
+        
+        return Response(stream(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+    
     @app.route('/api/mark-video-complete', methods=['POST'])
     @login_required
     def mark_video_complete():
@@ -720,58 +2321,317 @@ def create_app():
             return jsonify({'error': 'Video ID required'}), 400
         
         video = Video.query.get_or_404(video_id)
-        participant = current_user.participant_profile
-        
-        # Get or create course progress
-        course_progress = CourseProgress.query.filter_by(
-            participant_id=participant.id,
-            course_id=video.course_id
-        ).first()
-        
-        if not course_progress:
-            course_progress = CourseProgress(
-                participant_id=participant.id,
-                course_id=video.course_id
-            )
-            db.session.add(course_progress)
-            db.session.flush()
+        completion_percentage = write_queue.run(
+            record_video_completion, current_user.participant_profile.id, current_user.get_full_name(), video.id
+        )
+        # The event log is trimmed by the paths that grow it, not just while a feed is open
+        progress_broker.purge_if_due()
         
-        # Get or create video progress
-        video_progress = VideoProgress.query.filter_by(
-            course_progress_id=course_progress.id,
-            video_id=video_id
-        ).first()
+        return jsonify({
+            'success': True,
+            'completion_percentage': completion_percentage
+        })
+    
+    def get_assigned_participant(mentor, participant_id):
+        """Return the participant if assigned to this mentor, else None"""
+        for participant in mentor.assigned_participants:
+            if participant.id == participant_id:
+                return participant
+        return None
+    
+    @app.route('/submit-feedback', methods=['POST'])
+    @login_required
+    def submit_feedback():
+        """Save final mentor feedback and discard the matching draft"""
+        if current_user.user_type != 'mentor' or not current_user.mentor_profile:
+            flash('Access denied. This section is for mentors only.', 'error')
+            return redirect(url_for('index'))
         
-        if not video_progress:
-            video_progress = VideoProgress(
-                course_progress_id=course_progress.id,
-                video_id=video_id
-            )
-            db.session.add(video_progress)
+        mentor = current_user.mentor_profile
+        participant_id = request.form.get('participant_id', type=int)
+        week_number = request.form.get('week_number', type=int)
         
-        video_progress.is_completed = True
-        video_progress.completed_at = datetime.utcnow()
+        if not participant_id or not week_number:
+            flash('Please select a participant and week.', 'error')
+            return redirect(url_for('mentor_dashboard'))
         
-        # Update course completion percentage
-        total_videos = Video.query.filter_by(course_id=video.course_id).count()
-        completed_videos = VideoProgress.query.join(Video).filter(
-            VideoProgress.course_progress_id == course_progress.id,
-            VideoProgress.is_completed == True,
-            Video.course_id == video.course_id
-        ).count()
+        if not get_assigned_participant(mentor, participant_id):
+            flash('You can only give feedback to your assigned participants.', 'error')
+            return redirect(url_for('mentor_dashboard'))
         
-        course_progress.completion_percentage = int((completed_videos / total_videos) * 100)
+        values = dict(
+            participation_rating=parse_rating(request.form.get('participation_rating')),
+            creativity_rating=parse_rating(request.form.get('creativity_rating')),
+            collaboration_rating=parse_rating(request.form.get('collaboration_rating')),
+            initiative_rating=parse_rating(request.form.get('initiative_rating')),
+            comments=request.form.get('comments'),
+            suggestions=request.form.get('suggestions'),
+            flag_for_support=request.form.get('flag_for_support') == 'on'
+        )
         
-        if course_progress.completion_percentage == 100:
-            course_progress.completed_at = datetime.utcnow()
+        try:
+            write_queue.run(record_mentor_feedback, mentor.id, participant_id, week_number, values)
+            progress_broker.purge_if_due()
+            flash('Feedback submitted successfully!', 'success')
+        except Exception as e:
+            logging.error(f"Feedback submission error: {e}")
+            flash('Feedback submission failed. Please try again.', 'error')
         
-        db.session.commit()
+        return redirect(url_for('mentor_dashboard'))
+    
+    @app.route('/api/save-feedback-draft', methods=['POST'])
+    @login_required
+    def api_save_feedback_draft():
+        """API endpoint for autosaving feedback drafts"""
+        if current_user.user_type != 'mentor' or not current_user.mentor_profile:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            participant_id = int(data.get('participant_id'))
+            week_number = int(data.get('week_number'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Participant ID and week number required'}), 400
+        
+        mentor = current_user.mentor_profile
+        if not get_assigned_participant(mentor, participant_id):
+            return jsonify({'error': 'Participant not assigned to you'}), 403
+        
+        ttl = timedelta(hours=app.config['FEEDBACK_DRAFT_TTL_HOURS'])
+        saved = write_queue.run(save_feedback_draft, mentor.id, participant_id, week_number, data, ttl)
+        # Long-lived workers purge expired drafts as they go, not just at startup
+        purge_expired_feedback_drafts_if_due(app.config['FEEDBACK_DRAFT_PURGE_INTERVAL_SECONDS'])
         
+        return jsonify({'success': True, 'saved': saved})
+    
+    @app.route('/api/feedback-draft')
+    @login_required
+    def api_feedback_draft():
+        """API endpoint to restore a saved feedback draft"""
+        if current_user.user_type != 'mentor' or not current_user.mentor_profile:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        participant_id = request.args.get('participant_id', type=int)
+        week_number = request.args.get('week_number', type=int)
+        if not participant_id or not week_number:
+            return jsonify({'error': 'Participant ID and week number required'}), 400
+        
+        draft = load_feedback_draft(current_user.mentor_profile.id, participant_id, week_number)
+        return jsonify({'draft': draft})
+    
+    # Leaderboards
+    def is_admin_request():
+        """True when the request carries ADMIN_TOKEN in the X-Admin-Token header"""
+        token = app.config['ADMIN_TOKEN']
+        supplied = request.headers.get('X-Admin-Token')
+        if not (token and supplied):
+            return False
+        return hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+    
+    @app.route('/api/leaderboards/<metric>')
+    @login_required
+    def api_leaderboard(metric):
+        """Top participants for an SDG (and optionally a school) by completion or rating"""
+        if metric not in Leaderboards.METRICS:
+            return jsonify({'error': f"Unknown leaderboard: {metric}"}), 404
+
+        participant = current_user.participant_profile if current_user.user_type == 'participant' else None
+        sdg = request.args.get('sdg', type=int) or (participant.chosen_sdg if participant else None)
+        if not sdg:
+            return jsonify({'error': 'SDG required'}), 400
+        school = request.args.get('school')
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+        
+        leaderboards.sync()
         return jsonify({
-            'success': True,
-            'completion_percentage': course_progress.completion_percentage
+            'metric': metric,
+            'sdg': sdg,
+            'school': school,
+            'data': leaderboards.top(metric, sdg, school, limit),
+            'me': leaderboards.standing(metric, participant.id) if participant else None
         })
     
+    @app.route('/api/leaderboards/<metric>/me')
+    @login_required
+    def api_leaderboard_standing(metric):
+        """The current participant's rank within their SDG and school"""
+        if metric not in Leaderboards.METRICS:
+            return jsonify({'error': f"Unknown leaderboard: {metric}"}), 404
+        if current_user.user_type != 'participant' or not current_user.participant_profile:
+            return jsonify({'error': 'Access denied'}), 403
+        leaderboards.sync()
+        return jsonify({'metric': metric, 'data': leaderboards.standing(metric, current_user.participant_profile.id)})
+    
+    @app.route('/admin/leaderboards/rebuild', methods=['POST'])
+    def rebuild_leaderboards():
+        """Ask every worker to rebuild its leaderboards (requires ADMIN_TOKEN)"""
+        if not is_admin_request():
+            abort(404)
+        begin_write()
+        progress_broker.publish(None, 'leaderboard_rebuild', {'requested_at': datetime.utcnow().isoformat()})
+        db.session.commit()
+        return jsonify({'success': True}), 202
+    
+    # Request profiler captures
+    @app.route('/admin/profiles', methods=['GET', 'POST'])
+    def profile_index():
+        """List recent request profiles (requires PROFILER_TOKEN)"""
+        if not app.config['PROFILER_TOKEN']:
+            abort(404)
+        if request.method == 'POST':
+            if not request_profiler.sign_in(request.form.get('token')):
+                flash('Invalid profiler token.', 'error')
+            return redirect(url_for('profile_index'))
+        if not request_profiler.is_admin():
+            return render_template('profiles.html', signed_in=False)
+        return render_template('profiles.html', signed_in=True, captures=request_profiler.recent())
+    
+    @app.route('/admin/profiles/<name>')
+    def profile_download(name):
+        """Download a saved speedscope profile"""
+        if not request_profiler.is_admin():
+            abort(404)
+        return send_from_directory(app.config['PROFILER_DIR'], f'{name}.speedscope.json', as_attachment=True)
+    
+    # Catalog API
+    @app.errorhandler(CatalogQueryError)
+    def catalog_query_error(error):
+        return jsonify({'error': str(error)}), 400
+    
+    def current_participant_id():
+        if current_user.user_type == 'participant' and current_user.participant_profile:
+            return current_user.participant_profile.id
+        return None
+    
+    @app.route('/api/sdgs')
+    def api_sdgs():
+        """List SDGs from sdgs.xml"""
+        fields = parse_fields('sdgs', SDG_FIELDS)
+        page, next_cursor = paginate_list(load_sdg_xml())
+        data = [project(sdg, fields) for sdg in page]
+        return catalog_response({'data': data, 'next_cursor': next_cursor})
+    
+    @app.route('/api/curriculum/themes')
+    @login_required
+    def api_curriculum_themes():
+        """List curriculum themes, optionally with their weeks"""
+        fields = parse_fields('themes', THEME_FIELDS)
+        includes = parse_include(('weeks',))
+        week_fields = [field for field in parse_fields('weeks', WEEK_FIELDS, primary=False) if field != 'theme']
+        page, next_cursor = paginate_list(load_curriculum_xml())
+        
+        data = []
+        for theme in page:
+            item = project(theme, fields)
+            if 'weeks' in includes:
+                item['weeks'] = [project(week, week_fields) for week in theme['weeks']]
+            data.append(item)
+        
+        return catalog_response({'data': data, 'next_cursor': next_cursor})
+    
+    @app.route('/api/curriculum/weeks')
+    @login_required
+    def api_curriculum_weeks():
+        """List curriculum weeks across themes, filterable by ?theme="""
+        fields = parse_fields('weeks', WEEK_FIELDS)
+        theme_filter = request.args.get('theme')
+        weeks = [dict(week, theme=theme['name'])
+                 for theme in load_curriculum_xml() if not theme_filter or theme['name'] == theme_filter
+                 for week in theme['weeks']]
+        page, next_cursor = paginate_list(weeks)
+        data = [project(week, fields) for week in page]
+        return catalog_response({'data': data, 'next_cursor': next_cursor})
+    
+    def course_payload(*criteria):
+        fields = parse_fields('courses', COURSE_FIELDS)
+        includes = parse_include(('videos', 'progress'))
+        course_ids, data, next_cursor = paginate_table(Course.__table__, fields, *criteria)
+        
+        participant_id = current_participant_id() if 'progress' in includes else None
+        progress, completed = load_participant_progress(participant_id, course_ids) if participant_id else ({}, set())
+        
+        videos, truncated = {}, set()
+        if 'videos' in includes and course_ids:
+            videos, truncated = load_course_videos(course_ids, parse_fields('videos', VIDEO_FIELDS, primary=False))
+        
+        for course_id, item in zip(course_ids, data):
+            if 'videos' in includes:
+                item['videos'] = videos[course_id]
+                for video in item['videos']:
+                    video_id = video.pop('_id')
+                    if participant_id:
+                        video['completed'] = video_id in completed
+                # Courses with more than CATALOG_MAX_INCLUDED_VIDEOS point to the full, paginated list
+                item['videos_truncated'] = course_id in truncated
+                item['videos_next'] = url_for('api_videos', course_id=course_id) if course_id in truncated else None
+            if participant_id:
+                item['progress'] = progress.get(course_id)
+        return data, next_cursor, participant_id is not None
+    
+    @app.route('/api/courses')
+    @login_required
+    def api_courses():
+        """List active courses, filterable by ?sdg="""
+        criteria = [Course.__table__.c.is_active == True]
+        sdg = request.args.get('sdg', type=int)
+        if sdg:
+            criteria.append(Course.__table__.c.sdg_focus == sdg)
+        data, next_cursor, private = course_payload(*criteria)
+        return catalog_response({'data': data, 'next_cursor': next_cursor}, private=private)
+    
+    @app.route('/api/courses/<int:course_id>')
+    @login_required
+    def api_course(course_id):
+        """Single course, with optional videos and progress"""
+        data, _, private = course_payload(Course.__table__.c.id == course_id)
+        if not data:
+            return jsonify({'error': 'Course not found'}), 404
+        return catalog_response({'data': data[0]}, private=private)
+    
+    def video_payload(*criteria):
+        fields = parse_fields('videos', VIDEO_FIELDS)
+        includes = parse_include(('progress',))
+        video_ids, data, next_cursor = paginate_table(Video.__table__, fields, *criteria)
+        
+        participant_id = current_participant_id() if 'progress' in includes else None
+        if participant_id and video_ids:
+            video_progress_table = VideoProgress.__table__
+            progress_table = CourseProgress.__table__
+            completed = set(db.session.execute(
+                select(video_progress_table.c.video_id)
+                .join(progress_table, video_progress_table.c.course_progress_id == progress_table.c.id)
+                .where(progress_table.c.participant_id == participant_id,
+                       video_progress_table.c.video_id.in_(video_ids),
+                       video_progress_table.c.is_completed == True)
+            ).scalars())
+            for video_id, item in zip(video_ids, data):
+                item['completed'] = video_id in completed
+        return data, next_cursor, participant_id is not None
+    
+    @app.route('/api/videos')
+    @login_required
+    def api_videos():
+        """List videos, filterable by ?course_id= and ?week="""
+        table = Video.__table__
+        criteria = []
+        course_id = request.args.get('course_id', type=int)
+        if course_id:
+            criteria.append(table.c.course_id == course_id)
+        week = request.args.get('week', type=int)
+        if week:
+            criteria.append(table.c.week_number == week)
+        data, next_cursor, private = video_payload(*criteria)
+        return catalog_response({'data': data, 'next_cursor': next_cursor}, private=private)
+    
+    @app.route('/api/videos/<int:video_id>')
+    @login_required
+    def api_video(video_id):
+        """Single video, with optional progress"""
+        data, _, private = video_payload(Video.__table__.c.id == video_id)
+        if not data:
+            return jsonify({'error': 'Video not found'}), 404
+        return catalog_response({'data': data[0]}, private=private)
+    
     @app.route('/submit-reflection', methods=['POST'])
     @login_required
     def submit_reflection():
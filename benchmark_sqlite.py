@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+TALYOUTH SDG Leadership Program - SQLite Concurrency Benchmark
+Runs several worker processes, each with a pool of request threads like the
+gthread deployment, against one SQLite database at a target write rate and
+fails if any request hits 'database is locked'. Lock waits only pile up once
+many threads compete for the write lock, so the default runs 16 threads per
+process; scale --qps to what the host can serve.
+
+Example:
+    python benchmark_sqlite.py --workers 4 --threads 16 --qps 85 --duration 20
+    python benchmark_sqlite.py --baseline   # same load without SQLite production mode (expected to fail)
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_PASSWORD = 'benchmark-password'
+
+
+def configure_environment(database_path, production_mode, write_queue):
+    """Point app_local at the benchmark database before it is imported"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    os.environ['SQLITE_PRODUCTION_MODE'] = '1' if production_mode else '0'
+    os.environ['SQLITE_WRITE_QUEUE'] = '1' if write_queue else '0'
+    # Measure the database, not the per-user rate limits
+    os.environ['ADMISSION_CONTROL'] = '0'
+
+
+class LockErrorCounter(logging.Handler):
+    """Count 'database is locked' errors that the app logs instead of raising (background writes)"""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        if 'database is locked' in record.getMessage():
+            self.count += 1
+
+
+def setup_database(participant_count):
+    """Create one participant per request thread and return the sample video ids"""
+    from werkzeug.security import generate_password_hash
+    import app_local
+
+    with app_local.app.app_context():
+        # Cheap hashes keep the benchmark focused on database writes
+        password_hash = generate_password_hash(BENCH_PASSWORD, method='pbkdf2:sha256:1')
+        for index in range(participant_count):
+            user = app_local.User(
+                email=f'bench{index}@example.com',
+                password_hash=password_hash,
+                first_name='Bench',
+                last_name=f'User{index}',
+                user_type='participant'
+            )
+            app_local.db.session.add(user)
+            app_local.db.session.flush()
+            app_local.db.session.add(app_local.ParticipantProfile(user_id=user.id, chosen_sdg=2))
+        app_local.db.session.commit()
+        return [video.id for video in app_local.Video.query.all()]
+
+
+def run_thread(app, email, args, video_ids, deadline, stats):
+    """Issue a mix of write requests at this thread's share of the target rate"""
+    client = app.test_client()
+    credentials = {'email': email, 'password': BENCH_PASSWORD}
+    client.post('/login', data=credentials)
+
+    interval = args.workers * args.threads / args.qps
+    next_request = time.monotonic() + random.random() * interval
+    while time.monotonic() < deadline:
+        sleep_for = next_request - time.monotonic()
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+        next_request += interval
+
+        action = random.random()
+        started = time.monotonic()
+        try:
+            if action < 0.75:
+                response = client.post('/api/mark-video-complete', json={'video_id': random.choice(video_ids)})
+            elif action < 0.8:
+                response = client.get(f'/course/{random.choice([1, 2])}')
+            else:
+                response = client.post('/login', data=credentials)
+            if response.status_code >= 500:
+                stats['other_errors'] += 1
+        except Exception as e:
+            if 'database is locked' in str(e):
+                stats['lock_errors'] += 1
+            else:
+                stats['other_errors'] += 1
+        stats['latencies'].append(time.monotonic() - started)
+
+
+def run_worker(index, args, video_ids, results):
+    """One worker process: run --threads request threads concurrently, like a gthread worker"""
+    configure_environment(args.database, not args.baseline, args.write_queue)
+    import app_local
+
+    logged_lock_errors = LockErrorCounter()
+    logging.getLogger().addHandler(logged_lock_errors)
+    app = app_local.app
+    app.testing = True
+
+    deadline = time.monotonic() + args.duration
+    stats = [{'latencies': [], 'lock_errors': 0, 'other_errors': 0} for _ in range(args.threads)]
+    threads = [
+        threading.Thread(target=run_thread, args=(
+            app, f'bench{index * args.threads + thread}@example.com', args, video_ids, deadline, stats[thread]
+        ))
+        for thread in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Give queued writes a moment to flush before the process exits
+    time.sleep(0.2)
+    results.put((
+        [latency for thread_stats in stats for latency in thread_stats['latencies']],
+        sum(thread_stats['lock_errors'] for thread_stats in stats) + logged_lock_errors.count,
+        sum(thread_stats['other_errors'] for thread_stats in stats)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite multi-process write benchmark')
+    parser.add_argument('--workers', type=int, default=4, help='number of worker processes')
+    parser.add_argument('--threads', type=int, default=16, help='request threads per worker (gunicorn --threads)')
+    parser.add_argument('--qps', type=float, default=85, help='target total write requests per second')
+    parser.add_argument('--duration', type=float, default=20, help='seconds to run')
+    parser.add_argument('--database', help='SQLite file to use (default: a new temporary file)')
+    parser.add_argument('--write-queue', action='store_true', help='enable the single-writer queue')
+    parser.add_argument('--baseline', action='store_true', help='run without SQLite production mode')
+    args = parser.parse_args()
+
+    if not args.database:
+        args.database = os.path.join(tempfile.mkdtemp(prefix='talyouth-bench-'), 'bench.db')
+
+    configure_environment(args.database, not args.baseline, args.write_queue)
+    video_ids = setup_database(args.workers * args.threads)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_worker, args=(index, args, video_ids, results))
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    latencies = []
+    lock_errors = 0
+    other_errors = 0
+    for _ in processes:
+        worker_latencies, worker_lock_errors, worker_other_errors = results.get()
+        latencies.extend(worker_latencies)
+        lock_errors += worker_lock_errors
+        other_errors += worker_other_errors
+    for process in processes:
+        process.join()
+
+    latencies.sort()
+    achieved_qps = len(latencies) / args.duration
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+
+    print("=" * 60)
+    print("TALYOUTH SQLite Concurrency Benchmark")
+    print("=" * 60)
+    print(f"Mode: {'baseline' if args.baseline else 'production'}{' + write queue' if args.write_queue else ''}")
+    print(f"Workers: {args.workers} x {args.threads} threads  Duration: {args.duration}s  Target: {args.qps} req/s")
+    print(f"Requests: {len(latencies)}  Achieved: {achieved_qps:.1f} req/s")
+    print(f"Latency p50: {p50:.1f} ms  p95: {p95:.1f} ms")
+    print(f"Lock errors: {lock_errors}  Other errors: {other_errors}")
+    print("=" * 60)
+
+    if lock_errors or other_errors:
+        sys.exit(1)
+    if achieved_qps < args.qps * 0.9:
+        print("Target write rate not reached")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
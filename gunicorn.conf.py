@@ -0,0 +1,16 @@
+"""
+TALYOUTH SDG Leadership Program - Gunicorn Settings
+Loaded automatically by gunicorn from the working directory
+"""
+
+import os
+
+# Threaded workers so live SSE feeds do not block page requests. The app reads
+# WORKER_THREADS too, to keep some threads free of long-lived streams.
+worker_class = 'gthread'
+threads = int(os.environ.get('WORKER_THREADS', 16))
+
+# Each worker holds at most WORKER_THREADS - PROGRESS_FEED_RESERVED_THREADS live
+# dashboards, so the site-wide limit is workers x that (24 with these defaults).
+# Size both for the expected number of mentors online at once.
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
@@ -0,0 +1,45 @@
+"""Shared test setup: importing app_local creates the app, so point it at a throwaway database first"""
+import itertools
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(_tmp, 'test.db'))
+os.environ.setdefault('ADMISSION_CONTROL', '0')
+os.environ.setdefault('ADMISSION_SHM_PATH', os.path.join(_tmp, 'admission.bin'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_local
+from app_local import db, User, MentorProfile, ParticipantProfile
+
+app = app_local.app
+app.config['TESTING'] = True
+
+_ids = itertools.count(1)
+
+def create_user(user_type, **profile_fields):
+    """Create a user with its profile; returns (email, profile_id)"""
+    with app.app_context():
+        user = User(email=f"{user_type}{next(_ids)}@example.com", first_name='Test',
+                    last_name=user_type.title(), user_type=user_type)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.flush()
+        profile_class = MentorProfile if user_type == 'mentor' else ParticipantProfile
+        profile = profile_class(user_id=user.id, **profile_fields)
+        db.session.add(profile)
+        db.session.commit()
+        return user.email, profile.id
+
+def assign(mentor_id, participant_id):
+    with app.app_context():
+        mentor = db.session.get(MentorProfile, mentor_id)
+        mentor.assigned_participants.append(db.session.get(ParticipantProfile, participant_id))
+        db.session.commit()
+
+def login(email):
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': 'password'})
+    assert response.status_code == 302, response.status_code
+    return client
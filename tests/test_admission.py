@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+
+from support import app_local
+from app_local import AdmissionController, SharedTokenBuckets
+
+
+class SharedTokenBucketsTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'nested', 'admission.bin')
+        self.buckets = SharedTokenBuckets(self.path, slots=64)
+
+    def test_burst_then_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.buckets.consume('login:ip:10.0.0.1', rate=0.5, burst=3), 0)
+        self.assertAlmostEqual(self.buckets.consume('login:ip:10.0.0.1', rate=0.5, burst=3), 2, delta=0.1)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_keys_have_separate_budgets(self):
+        self.assertEqual(self.buckets.consume('login:ip:10.0.0.1', rate=0.1, burst=1), 0)
+        self.assertGreater(self.buckets.consume('login:ip:10.0.0.1', rate=0.1, burst=1), 0)
+        self.assertEqual(self.buckets.consume('login:ip:10.0.0.2', rate=0.1, burst=1), 0)
+
+    def test_budget_is_shared_through_the_file(self):
+        other = SharedTokenBuckets(self.path, slots=64)
+        self.assertEqual(self.buckets.consume('register', rate=0.1, burst=1), 0)
+        # Same process, so force the second table to map the file itself
+        other._pid = None
+        self.assertGreater(other.consume('register', rate=0.1, burst=1), 0)
+
+
+class AdmissionPathTest(unittest.TestCase):
+    def test_default_path_is_in_the_instance_folder(self):
+        flask_app = Flask('admission_test', instance_path=tempfile.mkdtemp())
+        flask_app.config['ADMISSION_CONTROL'] = False
+        AdmissionController().init_app(flask_app)
+        self.assertEqual(flask_app.config['ADMISSION_SHM_PATH'],
+                         os.path.join(flask_app.instance_path, 'admission.bin'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import base64
+import unittest
+
+import support
+from support import app, db, app_local
+from app_local import CATALOG_MAX_INCLUDED_VIDEOS, Course, Video
+
+
+class CatalogApiTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with app.app_context():
+            course = Course(title='Long Course', sdg_focus=13)
+            db.session.add(course)
+            db.session.flush()
+            # Inserted in reverse so playlist order differs from id order
+            for index in reversed(range(CATALOG_MAX_INCLUDED_VIDEOS + 5)):
+                db.session.add(Video(course_id=course.id, title=f'Part {index + 1}', video_url='https://example.com',
+                                     week_number=index // 10 + 1, order_in_week=index % 10 + 1))
+            db.session.commit()
+            cls.long_course_id = course.id
+        email, _ = support.create_user('participant', chosen_sdg=13)
+        cls.client = support.login(email)
+
+    def get(self, url, **kwargs):
+        response = self.client.get(url, **kwargs)
+        return response, response.get_json()
+
+    def test_cursor_walks_every_sdg_once(self):
+        numbers, cursor = [], None
+        while True:
+            response, body = self.get('/api/sdgs', query_string={'limit': 5, 'fields': 'number',
+                                                                  **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            numbers += [sdg['number'] for sdg in body['data']]
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(len(numbers), len(app_local.load_sdg_xml()))
+        self.assertEqual(len(set(numbers)), len(numbers))
+
+    def test_fields_projects_and_validates(self):
+        _, body = self.get('/api/courses', query_string={'fields': 'title,sdg_focus', 'limit': 1})
+        self.assertEqual(set(body['data'][0]), {'title', 'sdg_focus'})
+        response, body = self.get('/api/courses', query_string={'fields': 'title,bogus'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bogus', body['error'])
+
+    def test_invalid_and_negative_cursors_are_rejected(self):
+        negative = base64.urlsafe_b64encode(b'-5').decode('ascii')
+        for cursor in ('@@', negative):
+            response, body = self.get('/api/sdgs', query_string={'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(body['error'], 'Invalid cursor')
+
+    def test_unchanged_response_is_304(self):
+        response = self.client.get('/api/sdgs?fields=number,title')
+        etag = response.headers['ETag']
+        repeat = self.client.get('/api/sdgs?fields=number,title', headers={'If-None-Match': etag})
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.data, b'')
+        other = self.client.get('/api/sdgs?fields=number', headers={'If-None-Match': etag})
+        self.assertEqual(other.status_code, 200)
+
+    def test_included_videos_are_capped_in_order_and_flagged(self):
+        _, body = self.get(f'/api/courses/{self.long_course_id}',
+                           query_string={'include': 'videos', 'fields[videos]': 'title'})
+        course = body['data']
+        self.assertEqual(len(course['videos']), CATALOG_MAX_INCLUDED_VIDEOS)
+        self.assertEqual(course['videos'][0]['title'], 'Part 1')
+        self.assertEqual(course['videos'][-1]['title'], f'Part {CATALOG_MAX_INCLUDED_VIDEOS}')
+        self.assertTrue(course['videos_truncated'])
+
+        _, full = self.get(course['videos_next'] + '&limit=100&fields=id')
+        self.assertEqual(len(full['data']), CATALOG_MAX_INCLUDED_VIDEOS + 5)
+
+    def test_short_course_is_not_flagged(self):
+        _, body = self.get('/api/courses/1', query_string={'include': 'videos,progress'})
+        course = body['data']
+        self.assertFalse(course['videos_truncated'])
+        self.assertIsNone(course['videos_next'])
+        self.assertTrue(all('completed' in video for video in course['videos']))
+
+
+if __name__ == '__main__':
+    unittest.main()
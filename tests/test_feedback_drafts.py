@@ -0,0 +1,78 @@
+import unittest
+from datetime import datetime, timedelta
+
+import support
+from support import app, db, app_local
+from app_local import FeedbackDraft
+
+
+class FeedbackDraftTest(unittest.TestCase):
+    def setUp(self):
+        mentor_email, self.mentor_id = support.create_user('mentor')
+        _, self.participant_id = support.create_user('participant', chosen_sdg=4)
+        support.assign(self.mentor_id, self.participant_id)
+        self.client = support.login(mentor_email)
+
+    def save(self, week_number=1, **fields):
+        data = dict(participant_id=self.participant_id, week_number=week_number, **fields)
+        response = self.client.post('/api/save-feedback-draft', json=data)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['saved']
+
+    def load(self, week_number=1):
+        response = self.client.get('/api/feedback-draft', query_string={
+            'participant_id': self.participant_id, 'week_number': week_number})
+        return response.get_json()['draft']
+
+    def expire_drafts(self):
+        with app.app_context():
+            FeedbackDraft.query.filter_by(mentor_id=self.mentor_id).update(
+                {'expires_at': datetime.utcnow() - timedelta(minutes=1)})
+            db.session.commit()
+
+    def test_unchanged_save_is_skipped(self):
+        self.assertTrue(self.save(comments='Great start', participation_rating='4'))
+        self.assertFalse(self.save(comments='Great start', participation_rating='4'))
+        self.assertTrue(self.save(comments='Great start', participation_rating='5'))
+        self.assertEqual(self.load(), {'comments': 'Great start', 'participation_rating': '5'})
+
+    def test_last_write_wins_against_stored_row(self):
+        self.assertTrue(self.save(comments='first'))
+        self.assertTrue(self.save(comments='second'))
+        # Saving the first payload again must overwrite, not be mistaken for unchanged
+        self.assertTrue(self.save(comments='first'))
+        self.assertEqual(self.load(), {'comments': 'first'})
+
+    def test_expired_draft_is_hidden_and_resaved(self):
+        self.save(comments='stale')
+        self.expire_drafts()
+        self.assertIsNone(self.load())
+        self.assertTrue(self.save(comments='stale'))
+        self.assertEqual(self.load(), {'comments': 'stale'})
+
+    def test_purge_removes_expired_drafts(self):
+        self.save(week_number=1, comments='old')
+        self.expire_drafts()
+        app_local._next_feedback_draft_purge = 0
+        self.save(week_number=2, comments='new')
+        with app.app_context():
+            weeks = [draft.week_number for draft in FeedbackDraft.query.filter_by(mentor_id=self.mentor_id)]
+        self.assertEqual(weeks, [2])
+
+    def test_submit_discards_draft(self):
+        self.save(week_number=3, comments='almost done')
+        response = self.client.post('/submit-feedback', data={
+            'participant_id': self.participant_id, 'week_number': 3,
+            'participation_rating': '4', 'comments': 'done'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(self.load(week_number=3))
+
+    def test_unassigned_participant_is_rejected(self):
+        _, other_id = support.create_user('participant', chosen_sdg=4)
+        response = self.client.post('/api/save-feedback-draft', json={
+            'participant_id': other_id, 'week_number': 1, 'comments': 'hi'})
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
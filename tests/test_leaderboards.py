@@ -0,0 +1,82 @@
+import unittest
+
+import support
+from support import app, db, app_local
+from app_local import ProgressEvent, leaderboards, progress_broker
+
+
+class LeaderboardSyncTest(unittest.TestCase):
+    SDG = 17
+
+    def setUp(self):
+        self.context = app.app_context()
+        self.context.push()
+        leaderboards.sync()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def participant(self, school='Riverside High'):
+        email, participant_id = support.create_user('participant', chosen_sdg=self.SDG, school_organization=school)
+        return email, participant_id
+
+    def ranked_ids(self, school=None):
+        return [entry['participant_id'] for entry in leaderboards.top('completion', self.SDG, school, limit=100)]
+
+    def add_event(self, participant_id, event_id=None):
+        db.session.add(ProgressEvent(id=event_id, participant_id=participant_id,
+                                     event_type='participant_joined', payload='{}'))
+        db.session.commit()
+
+    def test_startup_rebuild_ran(self):
+        self.assertIsNotNone(leaderboards._last_event_id)
+
+    def test_join_event_adds_participant(self):
+        _, participant_id = self.participant()
+        leaderboards.sync()
+        self.assertNotIn(participant_id, self.ranked_ids())
+        progress_broker.publish(participant_id, 'participant_joined', {})
+        db.session.commit()
+        leaderboards.sync()
+        self.assertIn(participant_id, self.ranked_ids())
+        self.assertIn(participant_id, self.ranked_ids(school='riverside high'))
+
+    def test_late_commit_with_lower_id_is_applied_once(self):
+        _, early_id = self.participant()
+        _, late_id = self.participant()
+        newest = db.session.query(db.func.max(ProgressEvent.id)).scalar() or 0
+        # The later transaction commits first...
+        self.add_event(early_id, event_id=newest + 2)
+        leaderboards.sync()
+        self.assertEqual(leaderboards._last_event_id, newest + 2)
+        self.assertIn(early_id, self.ranked_ids())
+        # ...then the one holding the lower id
+        self.add_event(late_id, event_id=newest + 1)
+        leaderboards.sync()
+        self.assertIn(late_id, self.ranked_ids())
+        self.assertIn(newest + 1, leaderboards._recent_event_ids)
+
+    def test_completion_updates_rank_and_standing_is_read_only(self):
+        email, participant_id = self.participant(school='Hilltop')
+        _, other_id = self.participant(school='Hilltop')
+        for pid in (participant_id, other_id):
+            progress_broker.publish(pid, 'participant_joined', {})
+        db.session.commit()
+
+        client = support.login(email)
+        self.assertEqual(client.post('/api/mark-video-complete', json={'video_id': 1}).status_code, 200)
+        response = client.get('/api/leaderboards/completion/me')
+        standing = response.get_json()['data']
+        self.assertEqual(standing['school']['rank'], 1)
+        self.assertEqual(standing['school']['score'], 1)
+        self.assertEqual(standing['school']['out_of'], 2)
+
+        _, unknown_id = self.participant()
+        boards_before = {key: len(board) for key, board in leaderboards._boards.items()}
+        self.assertIsNone(leaderboards.standing('completion', unknown_id))
+        self.assertEqual({key: len(board) for key, board in leaderboards._boards.items()}, boards_before)
+
+
+if __name__ == '__main__':
+    unittest.main()
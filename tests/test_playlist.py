@@ -0,0 +1,102 @@
+import unittest
+
+from support import app, db, app_local
+from app_local import Course, CoursePlaylistVersion, Video, get_course_playlist
+
+
+class CoursePlaylistTest(unittest.TestCase):
+    def setUp(self):
+        self.context = app.app_context()
+        self.context.push()
+        self.first = Course(title='Clean Water', sdg_focus=6)
+        self.second = Course(title='Clean Energy', sdg_focus=7)
+        db.session.add_all([self.first, self.second])
+        db.session.flush()
+        self.intro = self.add_video(self.first, 'Intro', week_number=1, order_in_week=1)
+        self.deep_dive = self.add_video(self.first, 'Deep dive', week_number=1, order_in_week=2)
+        self.wrap_up = self.add_video(self.first, 'Wrap up', week_number=2, order_in_week=1)
+        self.solar = self.add_video(self.second, 'Solar', week_number=1, order_in_week=1)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def add_video(self, course, title, **fields):
+        video = Video(course_id=course.id, title=title, video_url=f'https://example.com/{title}', **fields)
+        db.session.add(video)
+        return video
+
+    def titles(self, course):
+        return [video['title'] for video in get_course_playlist(course.id).videos]
+
+    def version(self, course):
+        row = db.session.get(CoursePlaylistVersion, course.id)
+        return row.version if row else 0
+
+    def test_playlist_order_and_neighbours(self):
+        playlist = get_course_playlist(self.first.id)
+        self.assertEqual(self.titles(self.first), ['Intro', 'Deep dive', 'Wrap up'])
+        self.assertEqual(sorted(playlist.videos_by_week), [1, 2])
+        self.assertEqual(playlist.position(self.deep_dive.id), 2)
+        self.assertEqual(playlist.position(self.solar.id), 0)
+        self.assertIsNone(playlist.prev_video(self.intro.id))
+        self.assertEqual(playlist.next_video(self.deep_dive.id)['title'], 'Wrap up')
+        self.assertIsNone(playlist.next_video(self.wrap_up.id))
+
+    def test_cached_until_videos_change(self):
+        playlist = get_course_playlist(self.first.id)
+        self.assertIs(get_course_playlist(self.first.id), playlist)
+        self.first.description = 'Course edits do not touch the playlist'
+        db.session.commit()
+        self.assertIs(get_course_playlist(self.first.id), playlist)
+
+    def test_edit_rebuilds_course(self):
+        self.titles(self.first)
+        self.titles(self.second)
+        version = self.version(self.first)
+        second_playlist = get_course_playlist(self.second.id)
+        self.deep_dive.title = 'Deeper dive'
+        db.session.commit()
+        self.assertEqual(self.version(self.first), version + 1)
+        self.assertEqual(self.titles(self.first), ['Intro', 'Deeper dive', 'Wrap up'])
+        self.assertIs(get_course_playlist(self.second.id), second_playlist)
+
+    def test_reorder_rebuilds_course(self):
+        self.titles(self.first)
+        self.wrap_up.week_number = 1
+        self.wrap_up.order_in_week = 0
+        db.session.commit()
+        self.assertEqual(self.titles(self.first), ['Wrap up', 'Intro', 'Deep dive'])
+
+    def test_move_rebuilds_old_and_new_course(self):
+        self.titles(self.first)
+        self.titles(self.second)
+        self.deep_dive.course_id = self.second.id
+        db.session.commit()
+        self.assertEqual(self.titles(self.first), ['Intro', 'Wrap up'])
+        self.assertEqual(self.titles(self.second), ['Solar', 'Deep dive'])
+
+    def test_delete_rebuilds_course(self):
+        self.titles(self.second)
+        db.session.delete(self.solar)
+        db.session.commit()
+        self.assertEqual(self.titles(self.second), [])
+
+    def test_add_rebuilds_course(self):
+        self.titles(self.second)
+        self.add_video(self.second, 'Wind', week_number=1, order_in_week=2)
+        db.session.commit()
+        self.assertEqual(self.titles(self.second), ['Solar', 'Wind'])
+
+    def test_rolled_back_change_keeps_version(self):
+        version = self.version(self.first)
+        self.intro.title = 'Never saved'
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(self.version(self.first), version)
+        self.assertEqual(self.titles(self.first)[0], 'Intro')
+
+
+if __name__ == '__main__':
+    unittest.main()
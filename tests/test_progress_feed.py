@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime, timedelta
+
+import support
+from support import app, db, app_local
+from app_local import ProgressEvent, progress_broker
+
+
+class ProgressEventPurgeTest(unittest.TestCase):
+    def setUp(self):
+        with app.app_context():
+            ProgressEvent.query.delete()
+            old = datetime.utcnow() - timedelta(seconds=app.config['PROGRESS_FEED_RETENTION_SECONDS'] + 60)
+            for _ in range(3):
+                db.session.add(ProgressEvent(participant_id=None, event_type='progress', payload='{}', created_at=old))
+            db.session.commit()
+        progress_broker._next_purge = 0.0
+
+    def purge_if_due(self):
+        with app.app_context():
+            progress_broker.purge_if_due()
+
+    def event_count(self):
+        with app.app_context():
+            return ProgressEvent.query.count()
+
+    def test_publishing_paths_purge_without_subscribers(self):
+        self.assertEqual(progress_broker.stream_count(), 0)
+        email, _ = support.create_user('participant', chosen_sdg=2)
+        client = support.login(email)
+        response = client.post('/api/mark-video-complete', json={'video_id': 1})
+        self.assertEqual(response.status_code, 200)
+        # Expired events are gone; the completion just published is kept
+        with app.app_context():
+            self.assertEqual([event.event_type for event in ProgressEvent.query], ['progress'])
+            self.assertGreater(ProgressEvent.query.one().created_at, datetime.utcnow() - timedelta(minutes=1))
+
+    def test_purge_keeps_newest_event_and_is_throttled(self):
+        self.purge_if_due()
+        self.assertEqual(self.event_count(), 1)
+        with app.app_context():
+            ProgressEvent.query.update({'created_at': datetime.utcnow() - timedelta(days=1)})
+            db.session.add(ProgressEvent(participant_id=None, event_type='progress', payload='{}',
+                                         created_at=datetime.utcnow() - timedelta(days=1)))
+            db.session.commit()
+        self.purge_if_due()
+        self.assertEqual(self.event_count(), 2)
+
+    def test_stream_capacity_keeps_threads_for_requests(self):
+        config = app.config
+        self.assertEqual(progress_broker.stream_capacity(),
+                         min(config['PROGRESS_FEED_MAX_CONNECTIONS'],
+                             config['WORKER_THREADS'] - config['PROGRESS_FEED_RESERVED_THREADS']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import random
+import unittest
+
+from support import app_local
+
+RankTree = app_local.RankTree
+
+
+class RankTreeTest(unittest.TestCase):
+    def test_ties_share_competition_rank(self):
+        tree = RankTree()
+        for member, score in ((1, 5), (2, 9), (3, 5), (4, 2)):
+            tree.set(member, score)
+        self.assertEqual(tree.rank(2), 1)
+        self.assertEqual(tree.rank(1), 2)
+        self.assertEqual(tree.rank(3), 2)
+        self.assertEqual(tree.rank(4), 4)
+        self.assertIsNone(tree.rank(99))
+
+    def test_top_orders_ties_by_member(self):
+        tree = RankTree()
+        for member, score in ((7, 3), (2, 8), (5, 3), (1, 0), (9, 8)):
+            tree.set(member, score)
+        self.assertEqual(tree.top(4), [(2, 8, 1), (9, 8, 1), (5, 3, 3), (7, 3, 3)])
+        self.assertEqual(len(tree.top(100)), 5)
+
+    def test_top_within_one_large_tie(self):
+        tree = RankTree()
+        for member in range(5000, 0, -1):
+            tree.set(member, 0)
+        tree.set(4242, 3)
+        tree.remove(1)
+        self.assertEqual(tree.top(4), [(4242, 3, 1), (2, 0, 2), (3, 0, 2), (4, 0, 2)])
+        self.assertEqual(tree.rank(5000), 2)
+
+    def test_set_replaces_and_remove_forgets(self):
+        tree = RankTree()
+        tree.set(1, 4)
+        tree.set(2, 6)
+        tree.set(1, 10)
+        self.assertEqual(tree.score(1), 10)
+        self.assertEqual(tree.rank(1), 1)
+        self.assertEqual(len(tree), 2)
+        tree.remove(1)
+        tree.remove(1)
+        self.assertEqual(len(tree), 1)
+        self.assertIsNone(tree.score(1))
+        self.assertEqual(tree.top(10), [(2, 6, 1)])
+
+    def test_grows_past_initial_size(self):
+        tree = RankTree(size=4)
+        for member in range(1, 41):
+            tree.set(member, member * 3)
+        self.assertEqual(tree.rank(40), 1)
+        self.assertEqual(tree.rank(1), 40)
+        self.assertEqual([member for member, _, _ in tree.top(3)], [40, 39, 38])
+
+    def test_matches_sorting(self):
+        rng = random.Random(7)
+        tree = RankTree(size=4)
+        scores = {}
+        for _ in range(2000):
+            member = rng.randint(1, 60)
+            if rng.random() < 0.2:
+                tree.remove(member)
+                scores.pop(member, None)
+            else:
+                scores[member] = rng.randint(0, 300)
+                tree.set(member, scores[member])
+        for member, score in scores.items():
+            self.assertEqual(tree.rank(member), 1 + sum(1 for other in scores.values() if other > score))
+        expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:10]
+        self.assertEqual([(member, score) for member, score, _ in tree.top(10)], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()